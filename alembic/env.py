@@ -10,7 +10,7 @@ load_dotenv()
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.database import Base
-from app.models import user, appoitment, doctor_schedule
+from app.models import user, appoitment, doctor_schedule, doctor_schedule_rule, doctor_daily_availability, resource_version, monthly_doctor_stats, scheduler_lease, email_outbox
 
 db_user = os.getenv("DATABASE_USER")
 db_pass = os.getenv("DATABASE_PASSWORD")
@@ -0,0 +1,33 @@
+"""email_outbox server default times
+
+Revision ID: a3f7d1e9c462
+Revises: f2d9b6a3c158
+Create Date: 2025-08-18 14:22:31.846017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f7d1e9c462'
+down_revision: Union[str, Sequence[str], None] = 'f2d9b6a3c158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Workers compare these with the database clock (NOW()), so the database sets them too
+    op.alter_column('email_outbox', 'next_attempt_at', existing_type=sa.DateTime(),
+                    existing_nullable=False, server_default=sa.func.now())
+    op.alter_column('email_outbox', 'created_at', existing_type=sa.DateTime(),
+                    existing_nullable=False, server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    op.alter_column('email_outbox', 'created_at', existing_type=sa.DateTime(),
+                    existing_nullable=False, server_default=None)
+    op.alter_column('email_outbox', 'next_attempt_at', existing_type=sa.DateTime(),
+                    existing_nullable=False, server_default=None)
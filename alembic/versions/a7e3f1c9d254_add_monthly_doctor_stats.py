@@ -0,0 +1,34 @@
+"""add monthly_doctor_stats
+
+Revision ID: a7e3f1c9d254
+Revises: f5c2a8d1b736
+Create Date: 2025-08-08 11:36:52.940318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3f1c9d254'
+down_revision: Union[str, Sequence[str], None] = 'f5c2a8d1b736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'monthly_doctor_stats',
+        sa.Column('doctor_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('total_appointments', sa.Integer(), nullable=False),
+        sa.Column('total_patients', sa.Integer(), nullable=False),
+        sa.Column('total_earned', sa.Integer(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('monthly_doctor_stats')
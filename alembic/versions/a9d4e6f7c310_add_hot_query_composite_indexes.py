@@ -0,0 +1,35 @@
+"""add hot query composite indexes
+
+Revision ID: a9d4e6f7c310
+Revises: f3c8a1e5b92d
+Create Date: 2025-07-25 11:18:03.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e6f7c310'
+down_revision: Union[str, Sequence[str], None] = 'f3c8a1e5b92d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # doctor_schedules(doctor_id, date, start_time) is already covered by uq_doctor_schedules_slot
+    op.create_index('ix_appointments_doctor_datetime_status', 'appointments', ['doctor_id', 'appointment_datetime', 'status'])
+    op.create_index('ix_appointments_patient_datetime', 'appointments', ['patient_id', 'appointment_datetime'])
+    op.create_index('ix_appointments_status_datetime', 'appointments', ['status', 'appointment_datetime'])
+    op.create_index('ix_doctor_schedules_date_status', 'doctor_schedules', ['date', 'status', 'doctor_id'])
+    op.create_index('ix_users_type_full_name', 'users', ['user_type', 'full_name'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_type_full_name', table_name='users')
+    op.drop_index('ix_doctor_schedules_date_status', table_name='doctor_schedules')
+    op.drop_index('ix_appointments_status_datetime', table_name='appointments')
+    op.drop_index('ix_appointments_patient_datetime', table_name='appointments')
+    op.drop_index('ix_appointments_doctor_datetime_status', table_name='appointments')
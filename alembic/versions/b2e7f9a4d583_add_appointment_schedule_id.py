@@ -0,0 +1,48 @@
+"""add appointment schedule_id
+
+Revision ID: b2e7f9a4d583
+Revises: a9d4e6f7c310
+Create Date: 2025-07-28 16:45:29.377120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7f9a4d583'
+down_revision: Union[str, Sequence[str], None] = 'a9d4e6f7c310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('appointments', sa.Column('schedule_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_appointments_schedule_id'), 'appointments', ['schedule_id'], unique=False)
+    op.create_foreign_key(
+        'fk_appointments_schedule_id', 'appointments', 'doctor_schedules',
+        ['schedule_id'], ['id'], ondelete='SET NULL',
+    )
+
+    # Backfill active appointments with the slot the old range lookup would have matched
+    op.execute(
+        """
+        UPDATE appointments AS a
+        JOIN doctor_schedules AS s
+          ON s.doctor_id = a.doctor_id
+         AND s.date = DATE(a.appointment_datetime)
+         AND s.start_time <= TIME(a.appointment_datetime)
+         AND s.end_time > TIME(a.appointment_datetime)
+        SET a.schedule_id = s.id
+        WHERE a.schedule_id IS NULL
+          AND a.status <> 'cancelled'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_appointments_schedule_id', 'appointments', type_='foreignkey')
+    op.drop_index(op.f('ix_appointments_schedule_id'), table_name='appointments')
+    op.drop_column('appointments', 'schedule_id')
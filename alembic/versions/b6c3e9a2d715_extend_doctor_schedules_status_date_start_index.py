@@ -0,0 +1,34 @@
+"""extend doctor_schedules status/date/start_time index to the full sort key
+
+Revision ID: b6c3e9a2d715
+Revises: a3f7d1e9c462
+Create Date: 2025-08-19 09:41:18.527093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c3e9a2d715'
+down_revision: Union[str, Sequence[str], None] = 'a3f7d1e9c462'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The earliest-slot search orders by (date, start_time, end_time, doctor_id); with all of them
+    # after status the index yields that order, so MySQL stops after N rows instead of filesorting
+    # every future available slot
+    op.drop_index('ix_doctor_schedules_status_date_start', table_name='doctor_schedules')
+    op.create_index(
+        'ix_doctor_schedules_status_date_start', 'doctor_schedules',
+        ['status', 'date', 'start_time', 'end_time', 'doctor_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_doctor_schedules_status_date_start', table_name='doctor_schedules')
+    op.create_index('ix_doctor_schedules_status_date_start', 'doctor_schedules', ['status', 'date', 'start_time'])
@@ -0,0 +1,36 @@
+"""add scheduler_leases
+
+Revision ID: b8d4a2e6c193
+Revises: a7e3f1c9d254
+Create Date: 2025-08-11 10:22:17.604385
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4a2e6c193'
+down_revision: Union[str, Sequence[str], None] = 'a7e3f1c9d254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    scheduler_leases = op.create_table(
+        'scheduler_leases',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('holder', sa.String(255), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    # Lease rows exist up front, so taking one is a single conditional UPDATE
+    op.bulk_insert(scheduler_leases, [
+        {'name': 'scheduler', 'holder': None, 'expires_at': datetime(1970, 1, 1)},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_leases')
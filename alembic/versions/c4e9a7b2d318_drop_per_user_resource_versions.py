@@ -0,0 +1,29 @@
+"""drop per-user resource_versions rows
+
+Revision ID: c4e9a7b2d318
+Revises: b6c3e9a2d715
+Create Date: 2025-08-19 14:06:37.214851
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7b2d318'
+down_revision: Union[str, Sequence[str], None] = 'b6c3e9a2d715'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Collections are now versioned by "collections:<name>" counters bumped after each commit;
+    # the "users:<id>" counters were only read by summing them, which scanned one row per user
+    op.execute("DELETE FROM resource_versions WHERE name LIKE 'users:%'")
+
+
+def downgrade() -> None:
+    # The summed per-user counters restart from zero with the next profile write
+    op.execute("DELETE FROM resource_versions WHERE name LIKE 'collections:%'")
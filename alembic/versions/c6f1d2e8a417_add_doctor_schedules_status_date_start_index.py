@@ -0,0 +1,27 @@
+"""add doctor_schedules status/date/start_time index
+
+Revision ID: c6f1d2e8a417
+Revises: b2e7f9a4d583
+Create Date: 2025-07-30 10:12:47.651803
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1d2e8a417'
+down_revision: Union[str, Sequence[str], None] = 'b2e7f9a4d583'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets the earliest-slot search read available slots in time order and stop after N rows
+    op.create_index('ix_doctor_schedules_status_date_start', 'doctor_schedules', ['status', 'date', 'start_time'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_doctor_schedules_status_date_start', table_name='doctor_schedules')
@@ -0,0 +1,42 @@
+"""add email_outbox
+
+Revision ID: c9f5b3d7a461
+Revises: b8d4a2e6c193
+Create Date: 2025-08-13 16:48:09.315772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f5b3d7a461'
+down_revision: Union[str, Sequence[str], None] = 'b8d4a2e6c193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('recipients', sa.Text(), nullable=False),
+        sa.Column('subject', sa.String(255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'sending', 'sent', 'dead', name='emailstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_by', sa.String(255), nullable=True),
+        sa.Column('claimed_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,50 @@
+"""add active booking unique constraint
+
+Revision ID: d1f3a7c29e54
+Revises: c84454439aa0
+Create Date: 2025-07-20 10:12:41.502318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f3a7c29e54'
+down_revision: Union[str, Sequence[str], None] = 'c84454439aa0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Cancel double bookings left by the old check-then-insert path, keeping the oldest active row
+    op.execute(
+        """
+        UPDATE appointments AS newer
+        JOIN appointments AS older
+          ON older.doctor_id = newer.doctor_id
+         AND older.appointment_datetime = newer.appointment_datetime
+         AND older.status <> 'cancelled'
+         AND older.id < newer.id
+        SET newer.status = 'cancelled'
+        WHERE newer.status <> 'cancelled'
+        """
+    )
+    # NULL for cancelled appointments; MySQL allows repeated NULLs in a unique index,
+    # so the constraint only covers active (non-cancelled) bookings.
+    op.add_column(
+        'appointments',
+        sa.Column('active_booking', sa.Boolean(), sa.Computed("IF(status <> 'cancelled', 1, NULL)", persisted=True)),
+    )
+    op.create_unique_constraint(
+        'uq_appointments_doctor_active_slot',
+        'appointments',
+        ['doctor_id', 'appointment_datetime', 'active_booking'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_appointments_doctor_active_slot', 'appointments', type_='unique')
+    op.drop_column('appointments', 'active_booking')
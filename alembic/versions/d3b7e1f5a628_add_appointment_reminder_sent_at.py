@@ -0,0 +1,37 @@
+"""add appointment reminder_sent_at
+
+Revision ID: d3b7e1f5a628
+Revises: c9f5b3d7a461
+Create Date: 2025-08-15 11:02:41.508233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b7e1f5a628'
+down_revision: Union[str, Sequence[str], None] = 'c9f5b3d7a461'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('appointments', sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+
+    # The last midnight batch already reminded everything in the next 24h; don't remind it again
+    op.execute(
+        """
+        UPDATE appointments
+        SET reminder_sent_at = NOW()
+        WHERE status = 'confirmed'
+          AND appointment_datetime > NOW()
+          AND appointment_datetime <= NOW() + INTERVAL 24 HOUR
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('appointments', 'reminder_sent_at')
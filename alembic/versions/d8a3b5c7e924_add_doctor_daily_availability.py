@@ -0,0 +1,44 @@
+"""add doctor_daily_availability
+
+Revision ID: d8a3b5c7e924
+Revises: c6f1d2e8a417
+Create Date: 2025-08-01 14:27:05.218336
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a3b5c7e924'
+down_revision: Union[str, Sequence[str], None] = 'c6f1d2e8a417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'doctor_daily_availability',
+        sa.Column('doctor_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('open_slot_count', sa.Integer(), nullable=False),
+        sa.Column('first_open_time', sa.Time(), nullable=False),
+    )
+    op.create_index('ix_doctor_daily_availability_date', 'doctor_daily_availability', ['date', 'doctor_id'])
+
+    op.execute(
+        """
+        INSERT INTO doctor_daily_availability (doctor_id, date, open_slot_count, first_open_time)
+        SELECT doctor_id, date, COUNT(*), MIN(start_time)
+        FROM doctor_schedules
+        WHERE status = 'available'
+        GROUP BY doctor_id, date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_doctor_daily_availability_date', table_name='doctor_daily_availability')
+    op.drop_table('doctor_daily_availability')
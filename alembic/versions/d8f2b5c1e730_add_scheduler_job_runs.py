@@ -0,0 +1,30 @@
+"""add scheduler_job_runs
+
+Revision ID: d8f2b5c1e730
+Revises: c4e9a7b2d318
+Create Date: 2025-08-19 16:32:05.918274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f2b5c1e730'
+down_revision: Union[str, Sequence[str], None] = 'c4e9a7b2d318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduler_job_runs',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('last_run_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_job_runs')
@@ -0,0 +1,28 @@
+"""drop collection resource_versions rows
+
+Revision ID: e1a8c5f2b947
+Revises: d3b7e1f5a628
+Create Date: 2025-08-18 10:14:52.731904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a8c5f2b947'
+down_revision: Union[str, Sequence[str], None] = 'd3b7e1f5a628'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Collection versions are now summed from the per-entity counters; the shared rows
+    # were a lock every write queued on
+    op.execute("DELETE FROM resource_versions WHERE name IN ('users', 'doctor_schedules')")
+
+
+def downgrade() -> None:
+    op.execute("INSERT IGNORE INTO resource_versions (name, version) VALUES ('users', 0), ('doctor_schedules', 0)")
@@ -0,0 +1,29 @@
+"""add users full_name ngram fulltext index
+
+Revision ID: e4b9c2d6f318
+Revises: d8a3b5c7e924
+Create Date: 2025-08-04 09:51:33.804127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9c2d6f318'
+down_revision: Union[str, Sequence[str], None] = 'd8a3b5c7e924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ft_users_full_name', 'users', ['full_name'],
+        mysql_prefix='FULLTEXT', mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ft_users_full_name', table_name='users')
@@ -0,0 +1,42 @@
+"""add doctor schedule slot unique constraint
+
+Revision ID: e7b2c4d81f06
+Revises: d1f3a7c29e54
+Create Date: 2025-07-21 09:40:15.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2c4d81f06'
+down_revision: Union[str, Sequence[str], None] = 'd1f3a7c29e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop duplicate slots left by the old check-then-insert path, keeping the oldest row
+    op.execute(
+        """
+        DELETE newer FROM doctor_schedules AS newer
+        JOIN doctor_schedules AS older
+          ON older.doctor_id = newer.doctor_id
+         AND older.date = newer.date
+         AND older.start_time = newer.start_time
+         AND older.end_time = newer.end_time
+         AND older.id < newer.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_doctor_schedules_slot',
+        'doctor_schedules',
+        ['doctor_id', 'date', 'start_time', 'end_time'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_doctor_schedules_slot', 'doctor_schedules', type_='unique')
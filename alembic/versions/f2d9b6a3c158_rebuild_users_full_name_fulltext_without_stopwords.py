@@ -0,0 +1,38 @@
+"""rebuild users full_name fulltext index without stopwords
+
+Revision ID: f2d9b6a3c158
+Revises: e1a8c5f2b947
+Create Date: 2025-08-18 11:37:05.164228
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d9b6a3c158'
+down_revision: Union[str, Sequence[str], None] = 'e1a8c5f2b947'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The ngram parser drops every token containing a stopword, and InnoDB's default list has
+    # single letters such as "a" and "i", so most bigrams of names were never indexed. A FULLTEXT
+    # index keeps the stopword setting of the session that built it.
+    op.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    op.drop_index('ft_users_full_name', table_name='users')
+    op.create_index(
+        'ft_users_full_name', 'users', ['full_name'],
+        mysql_prefix='FULLTEXT', mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ft_users_full_name', table_name='users')
+    op.create_index(
+        'ft_users_full_name', 'users', ['full_name'],
+        mysql_prefix='FULLTEXT', mysql_with_parser='ngram',
+    )
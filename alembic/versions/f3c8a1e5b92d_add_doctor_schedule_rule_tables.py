@@ -0,0 +1,44 @@
+"""add doctor schedule rule tables
+
+Revision ID: f3c8a1e5b92d
+Revises: e7b2c4d81f06
+Create Date: 2025-07-23 15:02:47.661209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a1e5b92d'
+down_revision: Union[str, Sequence[str], None] = 'e7b2c4d81f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'doctor_schedule_rules',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('doctor_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, index=True),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('slot_minutes', sa.Integer(), nullable=False),
+        sa.Column('effective_from', sa.Date(), nullable=False),
+        sa.Column('effective_to', sa.Date(), nullable=True),
+    )
+    op.create_table(
+        'doctor_schedule_rule_exceptions',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('rule_id', sa.Integer(), sa.ForeignKey('doctor_schedule_rules.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.UniqueConstraint('rule_id', 'date', name='uq_doctor_schedule_rule_exceptions_rule_date'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('doctor_schedule_rule_exceptions')
+    op.drop_table('doctor_schedule_rules')
@@ -0,0 +1,35 @@
+"""add resource_versions
+
+Revision ID: f5c2a8d1b736
+Revises: e4b9c2d6f318
+Create Date: 2025-08-06 15:03:41.572960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c2a8d1b736'
+down_revision: Union[str, Sequence[str], None] = 'e4b9c2d6f318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    resource_versions = op.create_table(
+        'resource_versions',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+    )
+    # Collection counters are bumped on every write, so create them up front
+    op.bulk_insert(resource_versions, [
+        {'name': 'users', 'version': 0},
+        {'name': 'doctor_schedules', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('resource_versions')
@@ -1,6 +1,8 @@
+import asyncio
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -16,6 +18,11 @@ DATABASE_URL = (
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 )
 
+ASYNC_DATABASE_URL = (
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+)
+
+# Sync engine, used by Alembic, seeders and the background jobs
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
@@ -27,8 +34,105 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async engine, used by the API routes so queries don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+)
+
+AsyncSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=async_engine,
+    class_=AsyncSession,
+)
+
 Base = declarative_base()
 
+# Counters waiting for this process's publisher task, and that task. However many commits land
+# while a bump is in flight, they leave at most one pending bump per counter.
+_pending_versions = set()
+_publisher = None
+
+# Track the tables each transaction writes and, once it commits, bump the "tables:<name>"
+# counters of those that cached page counts read (app.utils.versions.COUNTED_TABLES), which
+# invalidates those counts in every process. The bump runs in its own short transaction after
+# the commit, so writers never hold its row lock for the length of their own transaction.
+@event.listens_for(Session, "after_flush")
+def track_flushed_tables(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        changed.add(obj.__table__.name)
+
+@event.listens_for(Session, "do_orm_execute")
+def track_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        changed = orm_execute_state.session.info.setdefault("changed_tables", set())
+        changed.add(orm_execute_state.statement.table.name)
+
+@event.listens_for(Session, "after_commit")
+def bump_changed_tables(session):
+    tables = session.info.pop("changed_tables", set())
+    # Counters the transaction asked to bump once it commits (app.utils.versions.bump_after_commit)
+    names = session.info.pop("bump_after_commit", set())
+    if tables or names:
+        from app.utils.versions import counted_table_versions  # app.utils.versions imports the models, which import this module
+        publish_versions(counted_table_versions(tables) | names)
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_tables(session):
+    session.info.pop("changed_tables", None)
+    session.info.pop("bump_after_commit", None)
+
+def publish_table_writes(tables):
+    """Bump the table counters of `tables` after a commit (also for writes made with engine.begin())."""
+    from app.utils.versions import counted_table_versions  # app.utils.versions imports the models, which import this module
+    publish_versions(counted_table_versions(tables))
+
+def publish_versions(names):
+    """Bump the counters `names` in their own transaction; call after the writes they version commit.
+
+    Sync callers (jobs, seeders) bump right away. On the event loop the names join this
+    process's pending set, drained by a single publisher task, so a burst of commits costs one
+    upsert and one pooled connection at a time instead of a task and a connection per commit.
+    """
+    global _publisher
+    if not names:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        from app.utils.versions import versions_bump
+        try:
+            with engine.begin() as conn:
+                conn.execute(versions_bump(names))
+        except Exception as e:
+            print("❌ Could not publish versions:", e)
+        return
+    _pending_versions.update(names)
+    # A task left behind by a closed event loop (e.g. a test client's) will never run again
+    if _publisher is None or _publisher.done() or _publisher.get_loop() is not loop:
+        _publisher = loop.create_task(publish_pending_versions())
+
+async def publish_pending_versions():
+    from app.utils.versions import versions_bump
+    # Names added while a bump is in flight are picked up by the next round, so every
+    # commit is still followed by a bump of its counters
+    while _pending_versions:
+        names = sorted(_pending_versions)
+        _pending_versions.clear()
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(versions_bump(names))
+        except Exception as e:
+            print("❌ Could not publish versions:", e)
+
+async def finish_publishing():
+    """Wait for this process's pending version bumps, e.g. before disposing of the async engine."""
+    if _publisher is not None and not _publisher.done() and _publisher.get_loop() is asyncio.get_running_loop():
+        await _publisher
+
 # Dependency to get DB session, use in FastAPI routes
 def get_db() -> Session:
     db = SessionLocal()
@@ -36,3 +140,8 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+# Async dependency to get DB session, use in FastAPI async routes
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,61 @@
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from app.database import engine
+from app.models.doctor_daily_availability import DoctorDailyAvailability
+from app.models.user import User, UserType
+from app.utils.daily_availability import (
+    DAILY_AVAILABILITY_HORIZON_DAYS, open_days, refresh_daily_availability_sync,
+)
+
+DAILY_AVAILABILITY_RECONCILE_MINUTES = int(os.getenv("DAILY_AVAILABILITY_RECONCILE_MINUTES", "60"))
+# Yesterday is included, so a refresh lost around midnight is still repaired
+RECONCILE_PAST_DAYS = 1
+
+def reconcile_daily_availability():
+    """Repair doctor_daily_availability from yesterday to the horizon.
+
+    A refresh that fails after its write committed (or a process that dies in between) leaves
+    the summary stale; rule slots entering the horizon have never been summarized. Runs in the
+    scheduler leader, recomputes each doctor's days without locking, and rewrites (and moves the
+    ETags of) only the doctors whose rows differ.
+    """
+    first = date.today() - timedelta(days=RECONCILE_PAST_DAYS)
+    last = date.today() + timedelta(days=DAILY_AVAILABILITY_HORIZON_DAYS)
+    dates = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="READ COMMITTED")
+            # One doctor at a time: every read below is a range of its (doctor_id, date) keys
+            doctor_ids = conn.execute(select(User.id).filter(User.user_type == UserType.doctor)).scalars().all()
+            for doctor_id in doctor_ids:
+                try:
+                    reconcile_doctor(conn, doctor_id, dates)
+                except Exception as e:
+                    print(f"❌ Could not reconcile daily availability of doctor {doctor_id}:", e)
+    except Exception as e:
+        print("❌ Error reconciling daily availability:", e)
+
+def reconcile_doctor(conn: Connection, doctor_id: int, dates: list):
+    with conn.begin():
+        expected = open_days(conn, doctor_id, dates)
+        stored = {
+            day: (count, first_open)
+            for day, count, first_open in conn.execute(
+                select(
+                    DoctorDailyAvailability.date,
+                    DoctorDailyAvailability.open_slot_count,
+                    DoctorDailyAvailability.first_open_time,
+                ).filter(
+                    DoctorDailyAvailability.doctor_id == doctor_id,
+                    DoctorDailyAvailability.date.between(dates[0], dates[-1]),
+                )
+            )
+        }
+    stale = [day for day in dates if expected.get(day) != stored.get(day)]
+    if stale:
+        # The refresh recomputes under the doctor's counter lock, so a write racing with
+        # the comparison above still ends with the latest rows
+        refresh_daily_availability_sync(doctor_id, stale)
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import socket
+import uuid
+from app.database import SessionLocal
+from app.models.email_outbox import EmailOutbox, EmailStatus
+from sqlalchemy import select, update, and_, or_, func, text
+from sqlalchemy.orm import Session
+from app.utils.email import OutgoingEmail, send_many, is_permanent_failure
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))                  # concurrent drain runs per process
+OUTBOX_POLL_SECONDS = int(os.getenv("OUTBOX_POLL_SECONDS", "10"))
+OUTBOX_CLAIM_SECONDS = int(os.getenv("OUTBOX_CLAIM_SECONDS", "300"))    # a crashed worker's batch is retaken after this
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BACKOFF_SECONDS = int(os.getenv("OUTBOX_RETRY_BACKOFF_SECONDS", "60"))
+
+def seconds_from_now(seconds: int):
+    # Database clock, so workers on different hosts agree on claims and retry times
+    return func.timestampadd(text("SECOND"), seconds, func.now())
+
+def claim_batch(db: Session, worker_id: str) -> list:
+    """Lease up to OUTBOX_BATCH_SIZE due emails to `worker_id`; rows other workers hold are skipped, not waited on."""
+    due = or_(
+        and_(EmailOutbox.status == EmailStatus.pending, EmailOutbox.next_attempt_at <= func.now()),
+        and_(EmailOutbox.status == EmailStatus.sending, EmailOutbox.claimed_until < func.now()),
+    )
+    ids = db.execute(
+        select(EmailOutbox.id).filter(due).order_by(EmailOutbox.id)
+        .limit(OUTBOX_BATCH_SIZE).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.commit()
+        return []
+
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ids))
+        .values(
+            status=EmailStatus.sending,
+            claimed_by=worker_id,
+            claimed_until=seconds_from_now(OUTBOX_CLAIM_SECONDS),
+            attempts=EmailOutbox.attempts + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(
+        select(EmailOutbox.id, EmailOutbox.recipients, EmailOutbox.subject, EmailOutbox.body, EmailOutbox.attempts)
+        .where(EmailOutbox.id.in_(ids))
+    ).all()
+    db.commit()
+    return rows
+
+def finish_batch(db: Session, worker_id: str, sent_ids: list, failures: list):
+    # claimed_by guards against overwriting a batch that expired and was retaken by another worker
+    if sent_ids:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(sent_ids), EmailOutbox.claimed_by == worker_id)
+            .values(status=EmailStatus.sent, sent_at=func.now(), claimed_by=None, claimed_until=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+    for row, error in failures:
+        if is_permanent_failure(error) or row.attempts >= OUTBOX_MAX_ATTEMPTS:
+            values = {"status": EmailStatus.dead}
+        else:
+            values = {
+                "status": EmailStatus.pending,
+                "next_attempt_at": seconds_from_now(OUTBOX_RETRY_BACKOFF_SECONDS * 2 ** (row.attempts - 1)),
+            }
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == row.id, EmailOutbox.claimed_by == worker_id)
+            .values(claimed_by=None, claimed_until=None, last_error=str(error)[:2000], **values)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+def drain_email_outbox():
+    """Send due outbox emails batch by batch until the outbox has no more due rows."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    db: Session = SessionLocal()
+    try:
+        while True:
+            rows = claim_batch(db, worker_id)
+            if not rows:
+                break
+
+            emails = {}
+            for row in rows:
+                emails[row.id] = OutgoingEmail(row.subject, row.recipients.split(","), row.body)
+            # The outbox schedules retries itself, so send_many makes a single attempt per email
+            try:
+                result = asyncio.run(send_many(list(emails.values()), max_retries=0))
+                failed_ids = {id(email): error for email, error in result["failed"]}
+            except Exception as error:
+                # Never leave a claimed batch in "sending": that would resend it once the claim expires
+                failed_ids = {id(email): error for email in emails.values()}
+            failures = [(row, failed_ids[id(emails[row.id])]) for row in rows if id(emails[row.id]) in failed_ids]
+            sent_ids = [row.id for row in rows if id(emails[row.id]) not in failed_ids]
+            finish_batch(db, worker_id, sent_ids, failures)
+
+            if len(rows) < OUTBOX_BATCH_SIZE:
+                break
+        db.close()
+    except Exception as e:
+        db.rollback()
+        print("❌ Error draining email outbox:", e)
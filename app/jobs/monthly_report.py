@@ -1,47 +1,95 @@
-import asyncio
-from datetime import datetime
-from app.database import SessionLocal
+import os
+from datetime import date, datetime, timedelta
+from app.database import SessionLocal, engine
 from app.models.appoitment import Appointment
+from app.models.email_outbox import EmailOutbox
+from app.models.monthly_doctor_stats import MonthlyDoctorStats
 from app.models.user import User
-from sqlalchemy import func
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.orm import Session
-from app.utils.email import send_email
+from app.utils.email import OutgoingEmail
+from app.utils.outbox import outbox_row
 
-def generate_monthly_reports():
-    db: Session = SessionLocal()
-    try:
-        today = datetime.today()
-        first_day = today.replace(day=1)
-        last_day = today
+REPORT_BATCH_SIZE = 500  # doctors rendered, stored and queued per transaction
+PERSIST_MONTHLY_DOCTOR_STATS = os.getenv("PERSIST_MONTHLY_DOCTOR_STATS", "true").lower() == "true"
+
+def previous_month(today: date) -> date:
+    return (today.replace(day=1) - timedelta(days=1)).replace(day=1)
 
-        doctors = db.query(User).filter(User.user_type == "doctor").all()
+def monthly_stats_query(first_day: date, next_month: date):
+    """Totals for every doctor in one grouped pass; doctors without appointments get zeros."""
+    total_appointments = func.count(Appointment.id)
+    return (
+        select(
+            User.id,
+            User.full_name,
+            User.email,
+            total_appointments.label("total_appointments"),
+            func.count(func.distinct(Appointment.patient_id)).label("total_patients"),
+            (total_appointments * func.coalesce(User.consultation_fee, 0)).label("total_earned"),
+        )
+        .outerjoin(Appointment, and_(
+            Appointment.doctor_id == User.id,
+            Appointment.appointment_datetime >= first_day,
+            Appointment.appointment_datetime < next_month,
+            Appointment.status == "completed",
+        ))
+        .filter(User.user_type == "doctor")
+        .group_by(User.id)
+    )
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+def render_report(stats) -> OutgoingEmail:
+    subject = f"Monthly Report for {stats.full_name}"
+    body = f"""
+        <h3>Monthly Report</h3>
+        <p>Appointments: {stats.total_appointments}</p>
+        <p>Patients: {stats.total_patients}</p>
+        <p>Total Earned: ৳{stats.total_earned or 0}</p>
+    """
+    return OutgoingEmail(subject, [stats.email], body)
 
-        for doc in doctors:
-            stats = db.query(
-                func.count(Appointment.id).label("total_appointments"),
-                func.count(func.distinct(Appointment.patient_id)).label("total_patients"),
-                func.sum(Appointment.consultation_fee).label("total_earned")
-            ).filter(
-                Appointment.doctor_id == doc.id,
-                Appointment.appointment_datetime >= first_day,
-                Appointment.appointment_datetime <= last_day,
-                Appointment.status == "completed"
-            ).first()
+def store_stats(conn, batch, month: date):
+    generated_at = datetime.now()
+    rows = [
+        {
+            "doctor_id": stats.id,
+            "month": month,
+            "total_appointments": stats.total_appointments,
+            "total_patients": stats.total_patients,
+            "total_earned": stats.total_earned or 0,
+            "generated_at": generated_at,
+        }
+        for stats in batch
+    ]
+    upsert = insert(MonthlyDoctorStats)
+    upsert = upsert.on_duplicate_key_update(
+        total_appointments=upsert.inserted.total_appointments,
+        total_patients=upsert.inserted.total_patients,
+        total_earned=upsert.inserted.total_earned,
+        generated_at=upsert.inserted.generated_at,
+    )
+    conn.execute(upsert, rows)
 
-            subject = f"Monthly Report for {doc.full_name}"
-            body = f"""
-                <h3>Monthly Report</h3>
-                <p>Appointments: {stats.total_appointments}</p>
-                <p>Patients: {stats.total_patients}</p>
-                <p>Total Earned: ৳{stats.total_earned or 0}</p>
-            """
-            loop.run_until_complete(send_email(subject, [doc.email], body))
+def generate_monthly_reports(month: date = None):
+    """Report on the given month (first day), by default the month that just ended."""
+    db: Session = SessionLocal()
+    month = month or previous_month(date.today())
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    try:
+        result = db.execute(
+            monthly_stats_query(month, next_month),
+            execution_options={"stream_results": True},
+        )
+        for batch in result.partitions(REPORT_BATCH_SIZE):
+            # Separate connection: the report query is still streaming on the session's one.
+            # Stats and their report emails commit together; the outbox workers send them.
+            with engine.begin() as conn:
+                if PERSIST_MONTHLY_DOCTOR_STATS:
+                    store_stats(conn, batch, month)
+                conn.execute(insert(EmailOutbox), [outbox_row(*render_report(stats)) for stats in batch])
 
         db.close()
     except Exception as e:
         db.rollback()
         print("❌ Error generating monthly report:", e)
-
@@ -1,37 +1,74 @@
-import asyncio
+import os
 from datetime import datetime, timedelta
 from app.database import SessionLocal
-from app.models.appoitment import Appointment
+from app.models.appoitment import Appointment, AppointmentStatus
 from app.models.user import User
-from sqlalchemy.orm import Session
-from app.utils.email import send_email
+from sqlalchemy import and_, or_, func, text
+from sqlalchemy.orm import Session, joinedload
+from app.utils.outbox import enqueue_email
+
+# How long before an appointment each reminder goes out, e.g. "1440,60" for 24h and 1h
+REMINDER_LEAD_MINUTES = sorted(
+    (int(minutes) for minutes in os.getenv("REMINDER_LEAD_MINUTES", "1440,60").split(",") if minutes.strip()),
+    reverse=True,
+)
+REMINDER_INTERVAL_MINUTES = int(os.getenv("REMINDER_INTERVAL_MINUTES", "5"))
+REMINDER_BATCH_SIZE = 500
+
+def reminder_due(now: datetime):
+    """Some lead time's window has started and no reminder was queued since it started."""
+    return or_(*(
+        and_(
+            Appointment.appointment_datetime <= now + timedelta(minutes=lead),
+            or_(
+                Appointment.reminder_sent_at.is_(None),
+                Appointment.reminder_sent_at < func.timestampadd(text("MINUTE"), -lead, Appointment.appointment_datetime),
+            ),
+        )
+        for lead in REMINDER_LEAD_MINUTES
+    ))
 
 def send_appointment_reminders():
+    """Queue reminders for confirmed appointments that entered a reminder window since the last run.
+
+    Runs every few minutes in the scheduler leader; reminder_sent_at is set in the same
+    transaction as the queued email, so re-runs and restarts never remind twice for the same window.
+    """
+    if not REMINDER_LEAD_MINUTES:
+        return
     db: Session = SessionLocal()
     try:
         now = datetime.now()
-        next_24_hours = now + timedelta(hours=24)
+        while True:
+            # Range on ix_appointments_status_datetime: confirmed and inside the longest window
+            appointments = db.query(Appointment).options(
+                joinedload(Appointment.patient),
+                joinedload(Appointment.doctor),
+            ).filter(
+                Appointment.status == AppointmentStatus.confirmed,
+                Appointment.appointment_datetime > now,
+                Appointment.appointment_datetime <= now + timedelta(minutes=REMINDER_LEAD_MINUTES[0]),
+                reminder_due(now),
+            ).order_by(Appointment.appointment_datetime).limit(REMINDER_BATCH_SIZE).all()
+            if not appointments:
+                break
 
-        appointments = db.query(Appointment).filter(
-            Appointment.status == "confirmed",
-            Appointment.appointment_datetime >= now,
-            Appointment.appointment_datetime <= next_24_hours
-        ).all()
+            for appt in appointments:
+                patient: User = appt.patient
+                subject = "Appointment Reminder"
+                body = f"""
+                    <p>Dear {patient.full_name},</p>
+                    <p>This is a reminder for your appointment with Dr. {appt.doctor.full_name} on {appt.appointment_datetime.strftime('%Y-%m-%d %H:%M')}.</p>
+                    <p>Thank you!</p>
+                """
+                enqueue_email(db, subject, [patient.email], body)
+                appt.reminder_sent_at = now
+            # The outbox workers deliver these; marker and emails commit together
+            db.commit()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        for appt in appointments:
-            patient: User = appt.patient
-            subject = "Appointment Reminder"
-            body = f"""
-                <p>Dear {patient.full_name},</p>
-                <p>This is a reminder for your appointment with Dr. ID {appt.doctor_id} on {appt.appointment_datetime.strftime('%Y-%m-%d %H:%M')}.</p>
-                <p>Thank you!</p>
-            """
-            loop.run_until_complete(send_email(subject, [patient.email], body))
+            if len(appointments) < REMINDER_BATCH_SIZE:
+                break
         db.close()
     except Exception as e:
         db.rollback()
         print("❌ Error in appointment reminder job:", e)
-
@@ -1,9 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from app.routers import auth, users,upload,appointments, doctor_schedule
-from app.utils.scheduler import start as start_scheduler
-
-start_scheduler()
+from app.routers import auth, users,upload,appointments, doctor_schedule, metrics, reports
+from app.utils import scheduler as background_jobs
+from app.database import async_engine, finish_publishing
+from app.utils import hash as password_hashing
 
 app = FastAPI(title="Appointments Booking System")
 
@@ -13,3 +14,26 @@ app.include_router(upload.router, prefix="/api", tags=["Image Upload"])
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
 app.include_router(doctor_schedule.router, prefix="/api/doctor-schedule", tags=["Doctor Schedule"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
+app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+
+@app.exception_handler(password_hashing.HashingOverloaded)
+async def hashing_overloaded_handler(request: Request, exc: password_hashing.HashingOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Every worker may start one; the scheduler lease lets only the leader run the jobs
+    if background_jobs.RUN_SCHEDULER_IN_WEB:
+        background_jobs.start()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    background_jobs.shutdown()
+    await finish_publishing()
+    await async_engine.dispose()
+    password_hashing.shutdown()
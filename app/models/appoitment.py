@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Text, Boolean, Computed, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -11,13 +11,28 @@ class AppointmentStatus(str, enum.Enum):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # NULL for cancelled rows, so only one active booking per doctor/time is allowed
+        UniqueConstraint("doctor_id", "appointment_datetime", "active_booking", name="uq_appointments_doctor_active_slot"),
+        Index("ix_appointments_doctor_datetime_status", "doctor_id", "appointment_datetime", "status"),
+        Index("ix_appointments_patient_datetime", "patient_id", "appointment_datetime"),
+        Index("ix_appointments_status_datetime", "status", "appointment_datetime"),
+        # Unfiltered admin listing and export: ORDER BY (appointment_datetime, id) read in index order
+        Index("ix_appointments_datetime_id", "appointment_datetime", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Slot this appointment occupies; set at booking so it can be freed or found by primary key
+    schedule_id = Column(Integer, ForeignKey("doctor_schedules.id", ondelete="SET NULL"), nullable=True, index=True)
     appointment_datetime = Column(DateTime, nullable=False)
     notes = Column(Text, nullable=True)
+    # When the latest reminder was queued; a lead time is due again only once its window starts after this
+    reminder_sent_at = Column(DateTime, nullable=True)
     status = Column(Enum(AppointmentStatus), default=AppointmentStatus.pending)
+    active_booking = Column(Boolean, Computed("IF(status <> 'cancelled', 1, NULL)", persisted=True))
 
     patient = relationship("User", back_populates="appointments", foreign_keys=[patient_id])
     doctor = relationship("User", back_populates="doctor_appointments", foreign_keys=[doctor_id])
+    schedule = relationship("DoctorSchedule")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, Time, Index
+from app.database import Base
+
+class DoctorDailyAvailability(Base):
+    """Per-day summary of a doctor's open slots, stored and rule-generated; a row exists only while open_slot_count > 0."""
+    __tablename__ = "doctor_daily_availability"
+    __table_args__ = (
+        Index("ix_doctor_daily_availability_date", "date", "doctor_id"),
+    )
+
+    doctor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    open_slot_count = Column(Integer, nullable=False)
+    first_open_time = Column(Time, nullable=False)
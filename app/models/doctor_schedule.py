@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, Time, Enum
+from sqlalchemy import Column, Integer, ForeignKey, Date, Time, Enum, UniqueConstraint, Index
 from app.database import Base
 from sqlalchemy.orm import relationship
 import enum
@@ -8,6 +8,13 @@ class ScheduleStatus(str, enum.Enum):
     booked = "booked"
 class DoctorSchedule(Base):
     __tablename__ = "doctor_schedules"
+    __table_args__ = (
+        # Also serves as the (doctor_id, date, start_time) lookup index
+        UniqueConstraint("doctor_id", "date", "start_time", "end_time", name="uq_doctor_schedules_slot"),
+        Index("ix_doctor_schedules_date_status", "date", "status", "doctor_id"),
+        # The earliest-slot search's full ORDER BY, so it reads in index order and stops at LIMIT
+        Index("ix_doctor_schedules_status_date_start", "status", "date", "start_time", "end_time", "doctor_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, Time, UniqueConstraint
+from app.database import Base
+from sqlalchemy.orm import relationship
+
+class DoctorScheduleRule(Base):
+    """Recurring weekly availability; slots are expanded on read and only stored once booked."""
+    __tablename__ = "doctor_schedule_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    slot_minutes = Column(Integer, nullable=False)
+    effective_from = Column(Date, nullable=False)
+    effective_to = Column(Date, nullable=True)
+
+    exceptions = relationship(
+        "DoctorScheduleRuleException",
+        back_populates="rule",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
+
+    @property
+    def exception_dates(self):
+        return sorted(exception.date for exception in self.exceptions)
+
+class DoctorScheduleRuleException(Base):
+    """A date on which a rule generates no slots (leave, holidays)."""
+    __tablename__ = "doctor_schedule_rule_exceptions"
+    __table_args__ = (
+        UniqueConstraint("rule_id", "date", name="uq_doctor_schedule_rule_exceptions_rule_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    rule_id = Column(Integer, ForeignKey("doctor_schedule_rules.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+
+    rule = relationship("DoctorScheduleRule", back_populates="exceptions")
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index, func
+from app.database import Base
+import enum
+
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending"
+    sent = "sent"
+    dead = "dead"
+
+class EmailOutbox(Base):
+    """Emails written in the same transaction as the change they announce; sent later by the outbox workers."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Claim query: due pending rows and expired sending claims, oldest first
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipients = Column(Text, nullable=False)  # comma separated
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(Enum(EmailStatus), default=EmailStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Database clock, like the claim and retry times the workers compare it with
+    next_attempt_at = Column(DateTime, server_default=func.now(), nullable=False)
+    claimed_by = Column(String(255), nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime, nullable=True)
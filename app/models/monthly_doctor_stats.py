@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime
+from app.database import Base
+
+class MonthlyDoctorStats(Base):
+    """Completed-appointment totals per doctor and month, written by the monthly report job."""
+    __tablename__ = "monthly_doctor_stats"
+
+    doctor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    total_appointments = Column(Integer, nullable=False)
+    total_patients = Column(Integer, nullable=False)
+    total_earned = Column(Integer, nullable=False)
+    generated_at = Column(DateTime, nullable=False)
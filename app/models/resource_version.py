@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, BigInteger
+from app.database import Base
+
+class ResourceVersion(Base):
+    """Write counter per entity ("users:<user_id>", "doctor_schedules:<doctor_id>") or table ("tables:<name>"), used for ETags and cache keys."""
+    __tablename__ = "resource_versions"
+
+    name = Column(String(100), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
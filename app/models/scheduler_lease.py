@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+class SchedulerLease(Base):
+    """Time-limited lock; only the process holding the "scheduler" lease runs background jobs."""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+class SchedulerJobRun(Base):
+    """When the leader last started each catch-up job (UTC), so a new leader can run the ones it missed."""
+    __tablename__ = "scheduler_job_runs"
+
+    name = Column(String(100), primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)
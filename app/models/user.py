@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, Text
+from sqlalchemy import Column, Integer, String, Enum, Text, Index
 from app.database import Base
 import enum
 from sqlalchemy.orm import relationship
@@ -12,6 +12,10 @@ class UserType(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_type_full_name", "user_type", "full_name"),
+        Index("ft_users_full_name", "full_name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100))
@@ -1,31 +1,52 @@
+import csv
+import io
+import orjson
 from fastapi import APIRouter, Depends, HTTPException,Query
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from app.database import get_async_db
 from app.models.appoitment import Appointment, AppointmentStatus
 from app.schemas.appointment import AppointmentCreate, AppointmentResponse, AppointmentUpdateStatus
 from app.models.user import User, UserType
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, get_token_user, TokenUser
 from app.schemas.paginated import PaginatedResponse
-from math import ceil
+from app.utils.serializers import page_response
 from typing import Optional
 from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
 from datetime import datetime, date
+from app.utils.schedule_rules import find_rule_slot, load_active_rules
+from app.utils.pagination import PageParams, paginate
+from app.utils.daily_availability import refresh_daily_availability
+from app.utils.versions import bump_versions, doctor_schedules_version
+from app.utils.outbox import enqueue_email
 
 router = APIRouter()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+EXPORT_BATCH_SIZE = 1000  # rows fetched from the server-side cursor per chunk
+EXPORT_COLUMNS = [
+    "id", "appointment_datetime", "status", "notes",
+    "patient_id", "patient_name", "doctor_id", "doctor_name", "consultation_fee",
+]
+
+def filter_appointments(query, status, start_date, end_date):
+    if start_date:
+        query = query.filter(Appointment.appointment_datetime >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.filter(Appointment.appointment_datetime <= datetime.combine(end_date, datetime.max.time()))
+
+    if status:
+        query = query.filter(Appointment.status == status)
+    return query
 
 @router.post("/", response_model=AppointmentResponse)
 async def book_appointment(
     appointment: AppointmentCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.user_type != UserType.patient:
         raise HTTPException(status_code=403, detail="Only patients can book appointments")
@@ -33,30 +54,58 @@ async def book_appointment(
     if appointment.appointment_datetime < datetime.now():
         raise HTTPException(status_code=400, detail="Appointment time cannot be in the past")
 
-    doctor = db.query(User).filter(User.id == appointment.doctor_id, User.user_type == UserType.doctor).first()
-    if not doctor:
-        raise HTTPException(status_code=404, detail="Doctor not found")
-
-    # Check doctor's schedule availability
-    schedule = db.query(DoctorSchedule).filter(
-        DoctorSchedule.doctor_id == appointment.doctor_id,
-        DoctorSchedule.date == appointment.appointment_datetime.date(),
-        DoctorSchedule.start_time <= appointment.appointment_datetime.time(),
-        DoctorSchedule.end_time > appointment.appointment_datetime.time(),
-        DoctorSchedule.status == "available"
-    ).first()
-
-    if not schedule:
-        raise HTTPException(status_code=400, detail="Doctor is not available at this time")
-
-    # Check appointment conflict
-    existing_appointment = db.query(Appointment).filter(
-        Appointment.doctor_id == appointment.doctor_id,
-        Appointment.appointment_datetime == appointment.appointment_datetime,
-        Appointment.status != AppointmentStatus.cancelled
-    ).first()
-
-    if existing_appointment:
+    appointment_date = appointment.appointment_datetime.date()
+    appointment_time = appointment.appointment_datetime.time()
+    # Plain read: no range or gap locks, so bookings of other slots of the day never wait on this one
+    schedule_id = await db.scalar(
+        select(DoctorSchedule.id).join(User, User.id == DoctorSchedule.doctor_id).filter(
+            User.user_type == UserType.doctor,
+            DoctorSchedule.doctor_id == appointment.doctor_id,
+            DoctorSchedule.date == appointment_date,
+            DoctorSchedule.start_time <= appointment_time,
+            DoctorSchedule.end_time > appointment_time,
+            DoctorSchedule.status == ScheduleStatus.available
+        ).order_by(DoctorSchedule.start_time.desc()).limit(1)
+    )
+    slot = [DoctorSchedule.id == schedule_id]
+
+    if not schedule_id:
+        doctor = await db.scalar(
+            select(User.id).filter(User.id == appointment.doctor_id, User.user_type == UserType.doctor)
+        )
+        if not doctor:
+            raise HTTPException(status_code=404, detail="Doctor not found")
+
+        # The slot may come from a recurring rule; the first booking materializes it as a row
+        rules = await load_active_rules(db, [appointment.doctor_id], appointment_date, appointment_date)
+        rule_slot = find_rule_slot(rules, appointment.appointment_datetime)
+        if not rule_slot:
+            raise HTTPException(status_code=400, detail="Doctor is not available at this time")
+
+        _, start_time, end_time = rule_slot
+        # Inserts the slot, or X-locks it if it already exists. Concurrent first bookings queue on
+        # that one row instead of each inserting into the same gap, which deadlocks in InnoDB.
+        materialize = insert(DoctorSchedule).values(
+            doctor_id=appointment.doctor_id,
+            date=appointment_date,
+            start_time=start_time,
+            end_time=end_time,
+            status=ScheduleStatus.available,
+        )
+        await db.execute(materialize.on_duplicate_key_update(id=DoctorSchedule.id))
+        slot = [
+            DoctorSchedule.doctor_id == appointment.doctor_id,
+            DoctorSchedule.date == appointment_date,
+            DoctorSchedule.start_time == start_time,
+        ]
+
+    # Lock the slot row by its key so concurrent bookings of it queue up behind this transaction.
+    # A locking read sees the latest commit, so everyone after the winner finds it booked.
+    result = await db.execute(
+        select(DoctorSchedule).filter(*slot).with_for_update().execution_options(populate_existing=True)
+    )
+    schedule = result.scalars().first()
+    if not schedule or schedule.status != ScheduleStatus.available:
         raise HTTPException(status_code=400, detail="This timeslot is already booked")
 
     new_appointment = Appointment(
@@ -65,26 +114,45 @@ async def book_appointment(
         appointment_datetime=appointment.appointment_datetime,
         notes=appointment.notes,
         status=AppointmentStatus.pending,
+        schedule=schedule,
     )
-    schedule.status = "booked"
+    schedule.status = ScheduleStatus.booked
     db.add(new_appointment)
-    db.commit()
-    db.refresh(new_appointment)
+
+    # uq_appointments_doctor_active_slot rejects a second active booking for the same doctor/time
+    try:
+        await bump_versions(db, doctor_schedules_version(schedule.doctor_id))
+        # Queued with the booking, so a rolled-back booking never sends a confirmation
+        enqueue_email(
+            db,
+            "Appointment Requested",
+            [current_user.email],
+            f"""
+                <p>Dear {current_user.full_name},</p>
+                <p>Your appointment request for {appointment.appointment_datetime.strftime('%Y-%m-%d %H:%M')} has been received.</p>
+            """,
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="This timeslot is already booked")
+    await refresh_daily_availability(schedule.doctor_id, [schedule.date])
+
+    await db.refresh(new_appointment)
     return new_appointment
 
 
 @router.get("/", response_model=PaginatedResponse[AppointmentResponse])
 async def get_appointments_with_filters(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    paging: PageParams = Depends(),
     status: Optional[AppointmentStatus] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    doctor_id: Optional[int] = Query(None)
+    doctor_id: Optional[int] = Query(None),
 ):
-    query = db.query(Appointment)
+    query = select(Appointment)
 
     # 🔐 Access control
     if current_user.user_type == UserType.patient:
@@ -94,51 +162,158 @@ async def get_appointments_with_filters(
     elif current_user.user_type == UserType.admin and doctor_id:
         query = query.filter(Appointment.doctor_id == doctor_id)
 
-    if start_date:
-        query = query.filter(Appointment.appointment_datetime >= datetime.combine(start_date, datetime.min.time()))
-    if end_date:
-        query = query.filter(Appointment.appointment_datetime <= datetime.combine(end_date, datetime.max.time()))
+    query = filter_appointments(query, status, start_date, end_date)
 
-    if status:
-        query = query.filter(Appointment.status == status)
+    appointments, total, total_exact, next_cursor = await paginate(
+        db, query, [Appointment.appointment_datetime, Appointment.id], paging, descending=True
+    )
 
-    total = query.count()
-    total_pages = ceil(total / limit)
-    appointments = query.order_by(Appointment.appointment_datetime.desc()) \
-        .offset((page - 1) * limit) \
-        .limit(limit) \
-        .all()
-
-    return PaginatedResponse(
-        data=appointments,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=total_pages
+    return page_response(AppointmentResponse, appointments, total, paging.page, paging.limit, total_exact, next_cursor)
+
+@router.get("/export")
+async def export_appointments(
+    current_user: TokenUser = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    status: Optional[AppointmentStatus] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    doctor_id: Optional[int] = Query(None),
+):
+    if current_user.user_type != UserType.admin:
+        raise HTTPException(status_code=403, detail="Only admin can export appointments")
+
+    patient = aliased(User)
+    doctor = aliased(User)
+    # Plain columns with both names joined in: one statement, no ORM identity map growing per row
+    query = (
+        select(
+            Appointment.id,
+            Appointment.appointment_datetime,
+            Appointment.status,
+            Appointment.notes,
+            Appointment.patient_id,
+            patient.full_name.label("patient_name"),
+            Appointment.doctor_id,
+            doctor.full_name.label("doctor_name"),
+            doctor.consultation_fee,
+        )
+        .join(patient, patient.id == Appointment.patient_id)
+        .join(doctor, doctor.id == Appointment.doctor_id)
+        .order_by(Appointment.appointment_datetime, Appointment.id)
     )
+    if doctor_id:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    query = filter_appointments(query, status, start_date, end_date)
+
+    async def rows():
+        # db.stream() reads through a server-side cursor, so memory stays flat for any row count
+        result = await db.stream(query)
+        async for batch in result.partitions(EXPORT_BATCH_SIZE):
+            yield batch
+
+    async def ndjson():
+        async for batch in rows():
+            yield b"".join(orjson.dumps(dict(row._mapping)) + b"\n" for row in batch)
+
+    async def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        async for batch in rows():
+            for row in batch:
+                writer.writerow([
+                    value.value if isinstance(value, AppointmentStatus) else value
+                    for value in row
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if format == "csv":
+        return StreamingResponse(
+            csv_lines(), media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="appointments.csv"'},
+        )
+    return StreamingResponse(
+        ndjson(), media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="appointments.ndjson"'},
+    )
+
+async def set_appointment_status(db: AsyncSession, appointment: Appointment, status: AppointmentStatus):
+    """Change the status and keep the linked slot in step: cancelling frees it, un-cancelling books it again."""
+    was_cancelled = appointment.status == AppointmentStatus.cancelled
+    appointment.status = status
+    if appointment.schedule_id is None or was_cancelled == (status == AppointmentStatus.cancelled):
+        return
+
+    if status == AppointmentStatus.cancelled:
+        await db.execute(
+            update(DoctorSchedule)
+            .where(DoctorSchedule.id == appointment.schedule_id)
+            .values(status=ScheduleStatus.available)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        result = await db.execute(
+            update(DoctorSchedule)
+            .where(DoctorSchedule.id == appointment.schedule_id, DoctorSchedule.status == ScheduleStatus.available)
+            .values(status=ScheduleStatus.booked)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=400, detail="This timeslot is already booked")
+
+async def enqueue_status_email(db: AsyncSession, appointment: Appointment):
+    patient = (await db.execute(
+        select(User.full_name, User.email).filter(User.id == appointment.patient_id)
+    )).one()
+    enqueue_email(
+        db,
+        "Appointment Status Updated",
+        [patient.email],
+        f"""
+            <p>Dear {patient.full_name},</p>
+            <p>Your appointment on {appointment.appointment_datetime.strftime('%Y-%m-%d %H:%M')} is now {appointment.status.value}.</p>
+        """,
+    )
+
+async def commit_status_change(db: AsyncSession, appointment: Appointment):
+    # Re-activating a cancelled appointment can collide with uq_appointments_doctor_active_slot
+    try:
+        if appointment.schedule_id is not None:
+            await bump_versions(db, doctor_schedules_version(appointment.doctor_id))
+        await enqueue_status_email(db, appointment)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="This timeslot is already booked")
+    if appointment.schedule_id is not None:
+        await refresh_daily_availability(appointment.doctor_id, [appointment.appointment_datetime.date()])
 
 @router.put("/status-update")
 async def update_appointment_status(
     data: AppointmentUpdateStatus,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    appointment = db.query(Appointment).filter(Appointment.id == data.appointment_id).first()
+    appointment = await db.get(Appointment, data.appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
     # Admin can update any appointment to any status
     if current_user.user_type == UserType.admin:
-        appointment.status = data.status
-        db.commit()
+        await set_appointment_status(db, appointment, data.status)
+        await commit_status_change(db, appointment)
         return {"message": f"Appointment status updated to {data.status} by admin"}
 
     # Doctor can update only their own appointments
     elif current_user.user_type == UserType.doctor:
         if appointment.doctor_id != current_user.id:
             raise HTTPException(status_code=403, detail="You can only update your own appointments")
-        appointment.status = data.status
-        db.commit()
+        await set_appointment_status(db, appointment, data.status)
+        await commit_status_change(db, appointment)
         return {"message": f"Appointment status updated to {data.status} by doctor"}
 
     # Patient can only cancel their own appointment
@@ -152,21 +327,8 @@ async def update_appointment_status(
         if appointment.appointment_datetime < datetime.now():
             raise HTTPException(status_code=400, detail="Cannot cancel past appointments")
 
-        appointment.status = AppointmentStatus.cancelled
-
-        # Free up schedule
-        schedule = db.query(DoctorSchedule).filter(
-            DoctorSchedule.doctor_id == appointment.doctor_id,
-            DoctorSchedule.date == appointment.appointment_datetime.date(),
-            DoctorSchedule.start_time <= appointment.appointment_datetime.time(),
-            DoctorSchedule.end_time > appointment.appointment_datetime.time(),
-            DoctorSchedule.status == ScheduleStatus.booked
-        ).first()
-
-        if schedule:
-            schedule.status = ScheduleStatus.available
-
-        db.commit()
+        await set_appointment_status(db, appointment, AppointmentStatus.cancelled)
+        await commit_status_change(db, appointment)
         return {"message": "Appointment cancelled by patient and slot freed"}
 
     raise HTTPException(status_code=403, detail="Unauthorized action")
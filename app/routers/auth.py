@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Security, Request,status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.user import User
-from app.utils.hash import verify_password
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.database import get_async_db
+from app.models.user import User, UserType
+from app.utils.cache import TTLCache
+from app.utils.hash import verify_password_async
 from app.utils.jwt import create_access_token
 from pydantic import BaseModel
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -15,17 +18,30 @@ SECRET_KEY = os.getenv("JWT_SECRET", "supersecretkey")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 security = HTTPBearer()
 
+# Authenticated users by email (the token subject); invalidate on profile changes
+user_cache = TTLCache(
+    "auth_users",
+    max_size=int(os.getenv("AUTH_CACHE_MAX_SIZE", "1024")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60")),
+)
+
 router = APIRouter()
 
 class LoginRequest(BaseModel):
     email: str
     password: str
 
+class TokenUser(BaseModel):
+    id: int
+    email: str
+    user_type: UserType
+
 
 @router.post("/login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(User).filter(User.email == request.email))
+    user = result.scalars().first()
+    if not user or not await verify_password_async(request.password, user.password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     access_token = create_access_token(
@@ -34,22 +50,42 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: get_db = Depends()
-):
-    token = credentials.credentials
-
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        if not email:
+        if not payload.get("sub"):
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+def invalidate_cached_user(email: str):
+    user_cache.delete(email)
 
-    user = db.query(User).filter(User.email == email).first()
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    email = decode_token(credentials.credentials)["sub"]
+
+    cached = user_cache.get(email)
+    if cached is not None:
+        # Attach a copy to this session without querying, so routes can still modify and commit it
+        return await db.merge(cached, load=False)
+
+    result = await db.execute(select(User).filter(User.email == email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    user_cache.set(email, snapshot)
     return user
+
+def get_token_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Trust the user_id/user_type claims in the token; for endpoints that only need role checks."""
+    payload = decode_token(credentials.credentials)
+    if payload.get("user_id") is None or payload.get("user_type") is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return TokenUser(id=payload["user_id"], email=payload["sub"], user_type=payload["user_type"])
@@ -1,55 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from sqlalchemy.orm import Session, joinedload
-from app.database import SessionLocal
-from app.models.doctor_schedule import DoctorSchedule
+import os
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy import select, insert, func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.database import get_async_db
+from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
+from app.models.doctor_schedule_rule import DoctorScheduleRule, DoctorScheduleRuleException
 from app.models.user import User, UserType
 from app.schemas.doctor_schedule import ScheduleBulkCreate, ScheduleResponse
-from app.routers.auth import get_current_user
-from math import ceil
+from app.schemas.doctor_schedule import ScheduleRuleCreate, ScheduleRuleExceptionCreate, ScheduleRuleResponse
+from app.routers.auth import get_current_user, get_token_user, TokenUser
 from app.schemas.paginated import PaginatedResponse
-from datetime import datetime, time, date
-from typing import Optional
-from app.schemas.doctor_schedule import DoctorBasicInfo
+from app.utils.serializers import page_response
+from datetime import datetime, time, date, timedelta
+from typing import Optional, List
+from app.schemas.doctor_schedule import DoctorBasicInfo, AvailableSlot
+from app.utils.schedule_rules import expand_rule, load_active_rules, active_rules_query
+from app.utils.pagination import PageParams, after_keyset, count_rows, paginate, decode_cursor, encode_cursor
+from app.utils.daily_availability import refresh_daily_availability, rule_dates
+from app.utils.name_search import name_search
+from app.utils.cache import ResponseCache
+from app.utils.singleflight import SingleFlight
+from app.utils.versions import DOCTOR_SCHEDULES_VERSION, DOCTORS_VERSION, bump_versions, doctor_schedules_version, get_versions, make_etag, not_modified
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 BUSINESS_START = time(9, 0)  # 09:00
 BUSINESS_END = time(18, 0)   # 18:00
+INSERT_BATCH_SIZE = 1000
+RULE_EXPANSION_DAYS = 14     # default window for slots generated by recurring rules
+SLOTS_PER_DOCTOR = 20        # default cap on slots listed per doctor in GET /doctor-availability
+# (date, start_time, end_time) is unique per doctor, so it is a complete keyset sort key
+SCHEDULE_SORT_COLUMNS = [DoctorSchedule.date, DoctorSchedule.start_time, DoctorSchedule.end_time]
 
-@router.post("/set-availability")
-async def set_availability(
-    payload: ScheduleBulkCreate,
-    doctor_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+# Serialized GET /doctor-availability/{doctor_id} pages per doctor, keyed by the doctor's
+# resource_versions counter, so a write to the doctor's slots or rules retires them in every worker
+availability_cache = ResponseCache(
+    "doctor_availability",
+    max_size=int(os.getenv("AVAILABILITY_CACHE_MAX_SIZE", "4096")),
+    ttl=float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "30")),
+)
+# Concurrent cache misses for the same page share one computation
+availability_flight = SingleFlight("doctor_availability")
+
+async def resolve_target_doctor_id(current_user: User, doctor_id: Optional[int], db: AsyncSession) -> int:
     if current_user.user_type == UserType.doctor:
-        target_doctor_id = current_user.id
+        return current_user.id
     elif current_user.user_type == UserType.admin:
         if not doctor_id:
             raise HTTPException(status_code=400, detail="doctor_id is required for admin.")
-        doctor = db.query(User).filter(User.id == doctor_id, User.user_type == UserType.doctor).first()
+        doctor = await db.scalar(select(User.id).filter(User.id == doctor_id, User.user_type == UserType.doctor))
         if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found.")
-        target_doctor_id = doctor.id
+        return doctor
     else:
         raise HTTPException(status_code=403, detail="Only doctor or admin can set availability.")
 
+def merge_rule_slots(schedules, rules, start_date: date, end_date: date, taken=()) -> List[dict]:
+    """Materialized slots plus the rule-generated slots that have no row yet, ordered by date and time.
 
-    inserted_count = 0
-    skipped_count = 0
+    `taken` holds extra (date, start_time, end_time) keys of rows that are not in `schedules`
+    but must still hide the rule slot they materialize (e.g. booked rows when listing available ones).
+    """
+    taken = set(taken) | {(sched.date, sched.start_time, sched.end_time) for sched in schedules}
+    slots = [
+        {
+            "id": sched.id,
+            "date": sched.date,
+            "start_time": sched.start_time,
+            "end_time": sched.end_time,
+            "status": sched.status,
+        }
+        for sched in schedules
+    ]
+    for rule in rules:
+        for day, start_time, end_time in expand_rule(rule, start_date, end_date):
+            if (day, start_time, end_time) in taken:
+                continue
+            taken.add((day, start_time, end_time))
+            slots.append({
+                "id": None,
+                "rule_id": rule.id,
+                "date": day,
+                "start_time": start_time,
+                "end_time": end_time,
+                "status": ScheduleStatus.available,
+            })
+    slots.sort(key=lambda slot: (slot["date"], slot["start_time"], slot["end_time"]))
+    return slots
+
+@router.post("/set-availability")
+async def set_availability(
+    payload: ScheduleBulkCreate,
+    doctor_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    target_doctor_id = await resolve_target_doctor_id(current_user, doctor_id, db)
 
     today = date.today()
     now = datetime.now().time()
 
+    rows = []
     for schedule in payload.schedules:
         #Check if date/time is not in the past
         if schedule.date < today or (schedule.date == today and schedule.start_time <= now):
@@ -65,28 +117,25 @@ async def set_availability(
                 detail=f"Schedule {schedule.start_time} to {schedule.end_time} is outside business hours."
             )
 
-        #Check for existing schedule
-        exists = db.query(DoctorSchedule).filter(
-            DoctorSchedule.doctor_id == target_doctor_id,
-            DoctorSchedule.date == schedule.date,
-            DoctorSchedule.start_time == schedule.start_time,
-            DoctorSchedule.end_time == schedule.end_time
-        ).first()
-
-        if not exists:
-            new_slot = DoctorSchedule(
-                doctor_id=target_doctor_id,
-                date=schedule.date,
-                start_time=schedule.start_time,
-                end_time=schedule.end_time,
-                status=schedule.status
-            )
-            db.add(new_slot)
-            inserted_count += 1
-        else:
-            skipped_count += 1
+        rows.append({
+            "doctor_id": target_doctor_id,
+            "date": schedule.date,
+            "start_time": schedule.start_time,
+            "end_time": schedule.end_time,
+            "status": schedule.status,
+        })
+
+    # uq_doctor_schedules_slot makes INSERT IGNORE skip existing slots (and repeats within the payload)
+    inserted_count = 0
+    stmt = insert(DoctorSchedule).prefix_with("IGNORE", dialect="mysql")
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        result = await db.execute(stmt, rows[i:i + INSERT_BATCH_SIZE])
+        inserted_count += result.rowcount
+    skipped_count = len(rows) - inserted_count
 
-    db.commit()
+    await bump_versions(db, doctor_schedules_version(target_doctor_id))
+    await db.commit()
+    await refresh_daily_availability(target_doctor_id, {row["date"] for row in rows})
     return {
         "message": "Availability update completed",
         "inserted": inserted_count,
@@ -97,89 +146,229 @@ async def set_availability(
 @router.get("/doctor-availability/{doctor_id}", response_model=PaginatedResponse[ScheduleResponse])
 async def get_doctor_schedule(
     doctor_id: int,
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    paging: PageParams = Depends(),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
 ):
-    doctor = db.query(User).filter(User.id == doctor_id, User.user_type == UserType.doctor).first()
+    # today is part of the keys because the rule expansion window starts at today
+    params = (*paging.key(), start_date, end_date, date.today())
+    # Versions are read before the page, so a concurrent write can only make the ETag older than the data
+    version = await get_versions(db, doctor_schedules_version(doctor_id))
+    etag = make_etag("doctor_schedule", doctor_id, version, params)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    # Same version as the ETag: a body cached under it is never older than the version it is served with
+    cache_key = availability_cache.key(doctor_id, version, params)
+    body = availability_cache.get(cache_key)
+    if body is None:
+        # The route is public, so the cache key (doctor, version, params) is the whole request identity
+        async def compute():
+            response = await doctor_schedule_page(db, doctor_id, paging, start_date, end_date)
+            availability_cache.set(cache_key, response.body)
+            return response.body
+
+        body = await availability_flight.do(cache_key, compute)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+async def doctor_schedule_page(
+    db: AsyncSession,
+    doctor_id: int,
+    paging: PageParams,
+    start_date: Optional[date],
+    end_date: Optional[date],
+):
+    doctor = await db.scalar(select(User.id).filter(User.id == doctor_id, User.user_type == UserType.doctor))
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
-    query = db.query(DoctorSchedule).filter(DoctorSchedule.doctor_id == doctor_id)
-    total = query.count()
-    total_pages = ceil(total / limit)
-
-    schedules = query.order_by(DoctorSchedule.date, DoctorSchedule.start_time) \
-                     .offset((page - 1) * limit) \
-                     .limit(limit) \
-                     .all()
-
-    return PaginatedResponse(
-        data=schedules,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=total_pages
-    )
+    query = select(DoctorSchedule).filter(DoctorSchedule.doctor_id == doctor_id)
+    if start_date:
+        query = query.filter(DoctorSchedule.date >= start_date)
+    if end_date:
+        query = query.filter(DoctorSchedule.date <= end_date)
+
+    # Doctors with recurring rules: expand them for a bounded window and merge with the stored rows.
+    # Only the generated slots are windowed; stored rows (past, booked, later) are listed as without rules.
+    window_start = max(start_date or date.today(), date.today())
+    window_end = end_date or date.today() + timedelta(days=RULE_EXPANSION_DAYS)
+    rules = await load_active_rules(db, [doctor_id], window_start, window_end) if window_start <= window_end else []
+    if rules:
+        # Only the window's stored keys are needed to drop the generated slots that already have a row
+        window_keys = await db.execute(
+            select(*SCHEDULE_SORT_COLUMNS).filter(
+                DoctorSchedule.doctor_id == doctor_id,
+                DoctorSchedule.date >= window_start,
+                DoctorSchedule.date <= window_end,
+            )
+        )
+        generated = merge_rule_slots([], rules, window_start, window_end, taken=window_keys.all())
+
+        total, total_exact = None, True
+        if paging.cursor is None or paging.with_total:
+            total, total_exact = await count_rows(db, query, paging.exact)
+            total += len(generated)
+
+        # The page lies within the first skip + limit + 1 slots of each sorted sequence,
+        # so stored rows are read in SQL only up to that boundary
+        page, limit = paging.page, paging.limit
+        stored_query, skip = query, (page - 1) * limit
+        if paging.cursor is not None:
+            after = decode_cursor(paging.cursor, SCHEDULE_SORT_COLUMNS)
+            stored_query, skip = query.filter(after_keyset(SCHEDULE_SORT_COLUMNS, after)), 0
+            generated = [slot for slot in generated if (slot["date"], slot["start_time"], slot["end_time"]) > tuple(after)]
+        result = await db.execute(stored_query.order_by(*SCHEDULE_SORT_COLUMNS).limit(skip + limit + 1))
+        slots = merge_rule_slots(result.scalars().all(), [], window_start, window_end) + generated[:skip + limit + 1]
+        slots.sort(key=lambda slot: (slot["date"], slot["start_time"], slot["end_time"]))
+        slots = slots[skip:]
+
+        next_cursor = None
+        if len(slots) > limit:
+            last = slots[limit - 1]
+            next_cursor = encode_cursor([last["date"], last["start_time"], last["end_time"]])
+        return page_response(ScheduleResponse, slots[:limit], total, page, limit, total_exact, next_cursor)
+
+    schedules, total, total_exact, next_cursor = await paginate(db, query, SCHEDULE_SORT_COLUMNS, paging)
+
+    return page_response(ScheduleResponse, schedules, total, paging.page, paging.limit, total_exact, next_cursor)
 
 @router.delete("/delete/{schedule_id}")
 async def delete_schedule(
     schedule_id: int = Path(..., description="Schedule ID to delete"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.user_type != UserType.doctor:
         raise HTTPException(status_code=403, detail="Only doctors can delete their availability")
 
-    schedule = db.query(DoctorSchedule).filter(
-        DoctorSchedule.id == schedule_id,
-        DoctorSchedule.doctor_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(DoctorSchedule).filter(
+            DoctorSchedule.id == schedule_id,
+            DoctorSchedule.doctor_id == current_user.id
+        )
+    )
+    schedule = result.scalars().first()
 
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found or not owned by doctor")
 
-    db.delete(schedule)
-    db.commit()
+    await db.delete(schedule)
+    await bump_versions(db, doctor_schedules_version(schedule.doctor_id))
+    await db.commit()
+    await refresh_daily_availability(schedule.doctor_id, [schedule.date])
     return {"message": f"Schedule ID {schedule_id} deleted successfully"}
 
+def upcoming_slot_filter(now: datetime):
+    return or_(
+        DoctorSchedule.date > now.date(),
+        and_(DoctorSchedule.date == now.date(), DoctorSchedule.start_time > now.time()),
+    )
+
+async def load_available_slots(
+    db: AsyncSession, doctor_ids, now: datetime, to_date: Optional[date], per_doctor: int
+) -> dict:
+    """First `per_doctor` upcoming available slots of each doctor, keyed by doctor id, in one IN query."""
+    if not doctor_ids:
+        return {}
+
+    slot_rank = func.row_number().over(
+        partition_by=DoctorSchedule.doctor_id, order_by=SCHEDULE_SORT_COLUMNS
+    ).label("slot_rank")
+    ranked = select(DoctorSchedule, slot_rank).filter(
+        DoctorSchedule.doctor_id.in_(doctor_ids),
+        DoctorSchedule.status == ScheduleStatus.available,
+        upcoming_slot_filter(now),
+    )
+    if to_date:
+        ranked = ranked.filter(DoctorSchedule.date <= to_date)
+    ranked = ranked.subquery()
+    slot = aliased(DoctorSchedule, ranked)
+
+    result = await db.execute(
+        select(slot)
+        .filter(ranked.c.slot_rank <= per_doctor)
+        .order_by(ranked.c.doctor_id, ranked.c.date, ranked.c.start_time, ranked.c.end_time)
+    )
+    slots_by_doctor = {doctor_id: [] for doctor_id in doctor_ids}
+    for schedule in result.scalars().all():
+        slots_by_doctor[schedule.doctor_id].append(schedule)
+    return slots_by_doctor
+
 @router.get("/doctor-availability", response_model=PaginatedResponse[DoctorBasicInfo])
 async def get_all_doctor_schedules(
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    paging: PageParams = Depends(),
+    from_date: Optional[date] = Query(None, alias="from", description="First date of the slot window (default today)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last date of the slot window"),
+    slots_per_doctor: int = Query(SLOTS_PER_DOCTOR, ge=1, le=100),
+    current_user: TokenUser = Depends(get_token_user)
 ):
     if current_user.user_type not in [UserType.admin, UserType.patient]:
         raise HTTPException(status_code=403, detail="Only Admin or Patient can access all doctor schedules")
 
+    # Slots drop out as time passes, so "now" is truncated to the minute and made part of the ETag
+    now = datetime.now().replace(second=0, microsecond=0)
+    if from_date and from_date > now.date():
+        now = datetime.combine(from_date, time.min)
+    etag = make_etag(
+        "doctor_availability", await get_versions(db, DOCTORS_VERSION, DOCTOR_SCHEDULES_VERSION), now,
+        to_date, slots_per_doctor, *paging.key(),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
     # Base query from User filtered by doctors
-    query = db.query(User).options(
-        joinedload(User.schedules)
-    ).filter(
+    query = select(User).filter(
         User.user_type == UserType.doctor
     )
 
-    total = query.count()
-    total_pages = ceil(total / limit)
+    doctors, total, total_exact, next_cursor = await paginate(
+        db, query, [User.full_name, User.id], paging
+    )
+    doctor_ids = [doctor.id for doctor in doctors]
+
+    # Past, booked and out-of-window slots never leave the database
+    slots_by_doctor = await load_available_slots(db, doctor_ids, now, to_date, slots_per_doctor)
+
+    window_start = now.date()
+    window_end = to_date or date.today() + timedelta(days=RULE_EXPANSION_DAYS)
+    rules_by_doctor = {}
+    if window_start <= window_end:
+        for rule in await load_active_rules(db, doctor_ids, window_start, window_end):
+            rules_by_doctor.setdefault(rule.doctor_id, []).append(rule)
 
-    doctors = query.order_by(User.full_name) \
-                   .offset((page - 1) * limit) \
-                   .limit(limit) \
-                   .all()
+    # Rule slots that were booked or blocked are stored rows that must hide the generated slot
+    taken_by_doctor = {}
+    if rules_by_doctor:
+        result = await db.execute(
+            select(DoctorSchedule.doctor_id, DoctorSchedule.date, DoctorSchedule.start_time, DoctorSchedule.end_time)
+            .filter(
+                DoctorSchedule.doctor_id.in_(list(rules_by_doctor)),
+                DoctorSchedule.status != ScheduleStatus.available,
+                DoctorSchedule.date >= window_start,
+                DoctorSchedule.date <= window_end,
+            )
+        )
+        for doctor_id, *key in result.all():
+            taken_by_doctor.setdefault(doctor_id, set()).add(tuple(key))
 
     response_data = []
     for doctor in doctors:
-        available_schedules = [
-            {
-                "id": sched.id,
-                "date": sched.date,
-                "start_time": sched.start_time,
-                "end_time": sched.end_time,
-                'status': sched.status,
-            }
-            for sched in doctor.schedules if getattr(sched, 'status', 'available') == 'available'
-        ]
+        available_schedules = slots_by_doctor[doctor.id]
+        if doctor.id in rules_by_doctor:
+            available_schedules = [
+                slot
+                for slot in merge_rule_slots(
+                    available_schedules, rules_by_doctor[doctor.id], window_start, window_end,
+                    taken=taken_by_doctor.get(doctor.id, ()),
+                )
+                if datetime.combine(slot["date"], slot["start_time"]) > now
+            ][:slots_per_doctor]
 
         doc_dict = {
             "id": doctor.id,
@@ -193,11 +382,206 @@ async def get_all_doctor_schedules(
         }
         response_data.append(doc_dict)
 
-    return PaginatedResponse(
-        data=response_data,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=total_pages
+    response = page_response(DoctorBasicInfo, response_data, total, paging.page, paging.limit, total_exact, next_cursor)
+    response.headers["ETag"] = etag
+    return response
+
+
+def doctor_location_filters(query, name_filter, division, district, thana):
+    query = query.filter(User.user_type == UserType.doctor)
+    if name_filter is not None:
+        query = query.filter(name_filter)
+    if division:
+        query = query.filter(User.division == division)
+    if district:
+        query = query.filter(User.district == district)
+    if thana:
+        query = query.filter(User.thana == thana)
+    return query
+
+def slot_with_doctor(doctor: User, **slot) -> dict:
+    return {
+        **slot,
+        "doctor_id": doctor.id,
+        "full_name": doctor.full_name,
+        "division": doctor.division,
+        "district": doctor.district,
+        "thana": doctor.thana,
+        "consultation_fee": doctor.consultation_fee,
+    }
+
+@router.get("/earliest-slots", response_model=List[AvailableSlot])
+async def get_earliest_slots(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenUser = Depends(get_token_user),
+    full_name: Optional[str] = Query(None),
+    division: Optional[str] = Query(None),
+    district: Optional[str] = Query(None),
+    thana: Optional[str] = Query(None),
+    from_date: Optional[date] = Query(None, alias="from", description="First date to search (default today)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last date to search"),
+    count: int = Query(10, ge=1, le=100),
+):
+    """Next `count` open slots across every matching doctor, ordered by time."""
+    if current_user.user_type not in [UserType.admin, UserType.patient]:
+        raise HTTPException(status_code=403, detail="Only Admin or Patient can search doctor schedules")
+
+    now = datetime.now()
+    if from_date and from_date > now.date():
+        now = datetime.combine(from_date, time.min)
+    name_filter = name_search(db.get_bind().dialect.name, User.full_name, full_name)[0] if full_name else None
+
+    # The ORDER BY is exactly ix_doctor_schedules_status_date_start after its status column, so
+    # MySQL walks the index in time order and stops after `count` matches, without a filesort
+    query = doctor_location_filters(
+        select(DoctorSchedule, User).join(User, DoctorSchedule.doctor_id == User.id),
+        name_filter, division, district, thana,
+    ).filter(
+        DoctorSchedule.status == ScheduleStatus.available,
+        upcoming_slot_filter(now),
+    )
+    if to_date:
+        query = query.filter(DoctorSchedule.date <= to_date)
+    result = await db.execute(query.order_by(*SCHEDULE_SORT_COLUMNS, DoctorSchedule.doctor_id).limit(count))
+    slots = [
+        slot_with_doctor(
+            doctor, id=schedule.id, date=schedule.date, start_time=schedule.start_time, end_time=schedule.end_time
+        )
+        for schedule, doctor in result.all()
+    ]
+
+    # Recurring rules of the matching doctors can generate earlier slots than the stored ones
+    window_start = now.date()
+    window_end = to_date or date.today() + timedelta(days=RULE_EXPANSION_DAYS)
+    if len(slots) == count:
+        window_end = min(window_end, slots[-1]["date"])
+    if window_start <= window_end:
+        rules_query = active_rules_query(
+            doctor_location_filters(select(User.id), name_filter, division, district, thana),
+            window_start, window_end,
+        )
+        rules = (await db.execute(rules_query)).scalars().all()
+    else:
+        rules = []
+    if rules:
+        doctor_ids = list({rule.doctor_id for rule in rules})
+        doctors = {
+            doctor.id: doctor
+            for doctor in (await db.execute(select(User).filter(User.id.in_(doctor_ids)))).scalars().all()
+        }
+        result = await db.execute(
+            select(DoctorSchedule.doctor_id, DoctorSchedule.date, DoctorSchedule.start_time, DoctorSchedule.end_time)
+            .filter(
+                DoctorSchedule.doctor_id.in_(doctor_ids),
+                DoctorSchedule.date >= window_start,
+                DoctorSchedule.date <= window_end,
+            )
+        )
+        taken = set(result.all())
+        for rule in rules:
+            for day, start_time, end_time in expand_rule(rule, window_start, window_end):
+                if (rule.doctor_id, day, start_time, end_time) in taken or datetime.combine(day, start_time) <= now:
+                    continue
+                taken.add((rule.doctor_id, day, start_time, end_time))
+                slots.append(slot_with_doctor(
+                    doctors[rule.doctor_id], id=None, rule_id=rule.id, date=day, start_time=start_time, end_time=end_time
+                ))
+        slots.sort(key=lambda slot: (slot["date"], slot["start_time"], slot["end_time"], slot["doctor_id"]))
+
+    return slots[:count]
+
+
+@router.post("/rules", response_model=ScheduleRuleResponse)
+async def create_schedule_rule(
+    payload: ScheduleRuleCreate,
+    doctor_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    target_doctor_id = await resolve_target_doctor_id(current_user, doctor_id, db)
+
+    if payload.start_time >= payload.end_time:
+        raise HTTPException(status_code=400, detail="start_time must be before end_time.")
+    if payload.start_time < BUSINESS_START or payload.end_time > BUSINESS_END:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rule {payload.start_time} to {payload.end_time} is outside business hours."
+        )
+    if payload.effective_to and payload.effective_to < payload.effective_from:
+        raise HTTPException(status_code=400, detail="effective_to cannot be before effective_from.")
+
+    rule = DoctorScheduleRule(
+        doctor_id=target_doctor_id,
+        weekday=payload.weekday,
+        start_time=payload.start_time,
+        end_time=payload.end_time,
+        slot_minutes=payload.slot_minutes,
+        effective_from=payload.effective_from,
+        effective_to=payload.effective_to,
+        exceptions=[DoctorScheduleRuleException(date=day) for day in set(payload.exceptions)],
+    )
+    db.add(rule)
+    await bump_versions(db, doctor_schedules_version(target_doctor_id))
+    await db.commit()
+    await refresh_daily_availability(target_doctor_id, rule_dates(rule))
+    return rule
+
+@router.get("/rules", response_model=List[ScheduleRuleResponse])
+async def get_schedule_rules(
+    doctor_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    target_doctor_id = await resolve_target_doctor_id(current_user, doctor_id, db)
+
+    result = await db.execute(
+        select(DoctorScheduleRule)
+        .filter(DoctorScheduleRule.doctor_id == target_doctor_id)
+        .order_by(DoctorScheduleRule.weekday, DoctorScheduleRule.start_time)
     )
+    return result.scalars().all()
+
+async def get_owned_rule(rule_id: int, current_user: User, db: AsyncSession) -> DoctorScheduleRule:
+    if current_user.user_type not in [UserType.doctor, UserType.admin]:
+        raise HTTPException(status_code=403, detail="Only doctor or admin can manage schedule rules.")
+
+    query = select(DoctorScheduleRule).filter(DoctorScheduleRule.id == rule_id)
+    if current_user.user_type == UserType.doctor:
+        query = query.filter(DoctorScheduleRule.doctor_id == current_user.id)
+    result = await db.execute(query)
+    rule = result.scalars().first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Schedule rule not found or not owned by doctor")
+    return rule
+
+@router.post("/rules/{rule_id}/exceptions", response_model=ScheduleRuleResponse)
+async def add_schedule_rule_exception(
+    payload: ScheduleRuleExceptionCreate,
+    rule_id: int = Path(..., description="Schedule rule ID"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    rule = await get_owned_rule(rule_id, current_user, db)
+
+    if payload.date not in {exception.date for exception in rule.exceptions}:
+        rule.exceptions.append(DoctorScheduleRuleException(date=payload.date))
+        await bump_versions(db, doctor_schedules_version(rule.doctor_id))
+        await db.commit()
+        await refresh_daily_availability(rule.doctor_id, [payload.date])
+    return rule
+
+@router.delete("/rules/{rule_id}")
+async def delete_schedule_rule(
+    rule_id: int = Path(..., description="Schedule rule ID to delete"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    rule = await get_owned_rule(rule_id, current_user, db)
 
+    # Slots already booked from this rule are materialized rows and stay untouched
+    dates = rule_dates(rule)
+    await db.delete(rule)
+    await bump_versions(db, doctor_schedules_version(rule.doctor_id))
+    await db.commit()
+    await refresh_daily_availability(rule.doctor_id, dates)
+    return {"message": f"Schedule rule ID {rule_id} deleted successfully"}
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models.email_outbox import EmailOutbox, EmailStatus
+from app.models.user import UserType
+from app.routers.auth import get_token_user, TokenUser
+from app.utils.cache import caches
+from app.utils.singleflight import flights
+
+router = APIRouter()
+
+@router.get("/cache")
+async def get_cache_metrics(current_user: TokenUser = Depends(get_token_user)):
+    if current_user.user_type != UserType.admin:
+        raise HTTPException(status_code=403, detail="Only admin can view metrics")
+
+    return {name: cache.stats() for name, cache in caches.items()}
+
+@router.get("/single-flight")
+async def get_single_flight_metrics(current_user: TokenUser = Depends(get_token_user)):
+    if current_user.user_type != UserType.admin:
+        raise HTTPException(status_code=403, detail="Only admin can view metrics")
+
+    return {name: flight.stats() for name, flight in flights.items()}
+
+@router.get("/email-outbox")
+async def get_email_outbox_metrics(
+    current_user: TokenUser = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if current_user.user_type != UserType.admin:
+        raise HTTPException(status_code=403, detail="Only admin can view metrics")
+
+    counts = dict((await db.execute(
+        select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status)
+    )).all())
+    oldest_pending = await db.scalar(
+        select(func.min(EmailOutbox.created_at)).filter(EmailOutbox.status == EmailStatus.pending)
+    )
+    return {
+        "depth": {status.value: counts.get(status, 0) for status in EmailStatus},
+        "oldest_pending_at": oldest_pending,
+    }
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+from app.database import get_async_db
+from app.models.monthly_doctor_stats import MonthlyDoctorStats
+from app.models.user import User, UserType
+from app.routers.auth import get_token_user, TokenUser
+from app.schemas.paginated import PaginatedResponse
+from app.schemas.report import MonthlyDoctorStatsResponse
+from app.utils.pagination import PageParams, paginate
+from app.utils.serializers import page_response
+
+router = APIRouter()
+
+@router.get("/monthly-doctor-stats", response_model=PaginatedResponse[MonthlyDoctorStatsResponse])
+async def get_monthly_doctor_stats(
+    month: date = Query(..., description="Any day of the month; stats are stored per calendar month"),
+    doctor_id: Optional[int] = Query(None),
+    current_user: TokenUser = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db),
+    paging: PageParams = Depends(),
+):
+    if current_user.user_type != UserType.admin:
+        raise HTTPException(status_code=403, detail="Only admin can view monthly reports")
+
+    # Precomputed by the monthly report job; nothing is aggregated here
+    query = select(
+        MonthlyDoctorStats.doctor_id,
+        User.full_name,
+        MonthlyDoctorStats.month,
+        MonthlyDoctorStats.total_appointments,
+        MonthlyDoctorStats.total_patients,
+        MonthlyDoctorStats.total_earned,
+        MonthlyDoctorStats.generated_at,
+    ).join(User, User.id == MonthlyDoctorStats.doctor_id).filter(MonthlyDoctorStats.month == month.replace(day=1))
+    if doctor_id:
+        query = query.filter(MonthlyDoctorStats.doctor_id == doctor_id)
+
+    rows, total, total_exact, next_cursor = await paginate(
+        db, query, [MonthlyDoctorStats.doctor_id], paging, scalars=False
+    )
+
+    return page_response(MonthlyDoctorStatsResponse, rows, total, paging.page, paging.limit, total_exact, next_cursor)
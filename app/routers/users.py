@@ -1,30 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException,Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException,Query, Request
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, aliased
 from app.schemas.user import UserCreate
-from app.utils.hash import hash_password
-from app.database import get_db
+from app.utils.hash import hash_password_async
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.paginated import PaginatedResponse
-from app.routers.auth import get_current_user
+from app.utils.serializers import page_response
+from app.utils.versions import DOCTOR_SCHEDULES_VERSION, DOCTORS_VERSION, bump_after_commit, get_versions, make_etag, not_modified
+from app.routers.auth import get_current_user, get_token_user, invalidate_cached_user, TokenUser
 from app.schemas.user import UserType,UserUpdate,DoctorList
-from math import ceil
-from app.models.appoitment import Appointment
+from app.models.appoitment import Appointment, AppointmentStatus
 from app.schemas.user import PatientWithAppointments
-from datetime import date
-from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
+from datetime import date, datetime
+from typing import Optional
+from app.utils.pagination import PageParams, paginate
+from app.utils.name_search import name_search
+from app.models.doctor_daily_availability import DoctorDailyAvailability
 
 router = APIRouter()
 
+APPOINTMENTS_PER_PATIENT = 5  # default cap on nested appointments in GET /patients
+
 @router.post("/register")
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter((User.email == user.email) | (User.mobile == user.mobile)).first():
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.execute(select(User.id).filter((User.email == user.email) | (User.mobile == user.mobile)))
+    if existing.first():
         raise HTTPException(status_code=400, detail="Email or Mobile already exists")
 
     new_user = User(
         full_name=user.full_name,
         email=user.email,
         mobile=user.mobile,
-        password=hash_password(user.password),
+        password=await hash_password_async(user.password),
         user_type=user.user_type,
         division=user.division,
         district=user.district,
@@ -34,17 +43,19 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         consultation_fee=user.consultation_fee,
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    if new_user.user_type == UserType.doctor:
+        bump_after_commit(db, DOCTORS_VERSION)
+    await db.commit()
+    await db.refresh(new_user)
     return {"message": "User created successfully"}
 
 @router.put("/update-profile")
 async def update_profile(
     updates: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    user = db.query(User).filter(User.id == current_user.id).first()
+    user = await db.get(User, current_user.id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -61,35 +72,51 @@ async def update_profile(
         if restricted_fields & update_data.keys():
             raise HTTPException(status_code=403, detail="Only doctors can update doctor-specific fields")
     if "password" in update_data:
-        hashed = hash_password(update_data["password"])
+        hashed = await hash_password_async(update_data["password"])
         update_data["password"] = hashed
     for key, value in update_data.items():
         setattr(current_user, key, value)
 
-    db.commit()
-    db.refresh(current_user)
+    if current_user.user_type == UserType.doctor:
+        bump_after_commit(db, DOCTORS_VERSION)
+    await db.commit()
+    invalidate_cached_user(current_user.email)
+    await db.refresh(current_user)
     return {"message": "Profile updated successfully"}
 
 @router.get("/doctors", response_model=PaginatedResponse[DoctorList])
 async def get_doctors_list_with_filters(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenUser = Depends(get_token_user),
+    paging: PageParams = Depends(),
     full_name: str = Query(None),
+    fuzzy: bool = Query(False, description="Fuzzy full_name match ranked by relevance (no cursor paging)"),
     division: str = Query(None),
     district: str = Query(None),
     thana: str = Query(None),
-    available_date: date = Query(None)
+    available_date: date = Query(None),
 ):
     if current_user.user_type not in [UserType.admin, UserType.patient]:
         raise HTTPException(status_code=403, detail="Unauthorized access")
 
-    query = db.query(User).filter(User.user_type == UserType.doctor)
+    # available_date is answered from doctor_daily_availability, which follows schedule writes
+    versions = await get_versions(db, DOCTORS_VERSION, *([DOCTOR_SCHEDULES_VERSION] if available_date else []))
+    etag = make_etag(
+        "doctors", versions, full_name, fuzzy, division, district, thana, available_date,
+        *paging.key(),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    query = select(User).filter(User.user_type == UserType.doctor)
 
     # Apply filters
+    rank_by = None
     if full_name:
-        query = query.filter(User.full_name.ilike(f"%{full_name}%"))
+        name_filter, rank_by = name_search(db.get_bind().dialect.name, User.full_name, full_name, fuzzy)
+        query = query.filter(name_filter)
     if division:
         query = query.filter(User.division == division)
     if district:
@@ -97,68 +124,104 @@ async def get_doctors_list_with_filters(
     if thana:
         query = query.filter(User.thana == thana)
 
-    # Filter by doctor availability
+    # Filter by doctor availability: semi-join against the per-day summary (rows exist only for open days;
+    # rule-generated slots count up to DAILY_AVAILABILITY_HORIZON_DAYS ahead)
     if available_date:
-        available_doctor_ids = db.query(DoctorSchedule.doctor_id).filter(
-            DoctorSchedule.date == available_date,
-            DoctorSchedule.status == ScheduleStatus.available
-        ).distinct().all()
-        available_ids = [d[0] for d in available_doctor_ids]
-
-        query = query.filter(User.id.in_(available_ids))
+        query = query.filter(User.id.in_(
+            select(DoctorDailyAvailability.doctor_id).filter(DoctorDailyAvailability.date == available_date)
+        ))
 
     # Pagination
-    total = query.count()
-    total_pages = ceil(total / limit)
-    doctors = query.order_by(User.full_name) \
-        .offset((page - 1) * limit) \
-        .limit(limit) \
-        .all()
-
-    return PaginatedResponse(
-        data=doctors,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=total_pages
+    doctors, total, total_exact, next_cursor = await paginate(
+        db, query, [User.full_name, User.id], paging, rank_by=rank_by
     )
 
+    response = page_response(DoctorList, doctors, total, paging.page, paging.limit, total_exact, next_cursor)
+    response.headers["ETag"] = etag
+    return response
+
+
+async def load_recent_appointments(db: AsyncSession, patients, per_patient: int, filters=()) -> list:
+    """Patients with their most recent `per_patient` matching appointments and the matching count, in one IN query."""
+    patient_ids = [patient.id for patient in patients]
+    appointments = {patient_id: [] for patient_id in patient_ids}
+    counts = {patient_id: 0 for patient_id in patient_ids}
+
+    ranked = select(
+        Appointment,
+        func.row_number().over(
+            partition_by=Appointment.patient_id,
+            order_by=[Appointment.appointment_datetime.desc(), Appointment.id.desc()],
+        ).label("appointment_rank"),
+        func.count().over(partition_by=Appointment.patient_id).label("appointment_count"),
+    ).filter(Appointment.patient_id.in_(patient_ids), *filters).subquery()
+    appointment = aliased(Appointment, ranked)
+
+    if patient_ids:
+        result = await db.execute(
+            select(appointment, ranked.c.appointment_count)
+            .filter(ranked.c.appointment_rank <= per_patient)
+            .options(joinedload(appointment.doctor))
+            .order_by(ranked.c.patient_id, ranked.c.appointment_rank)
+        )
+        for row, count in result.all():
+            appointments[row.patient_id].append(row)
+            counts[row.patient_id] = count
+
+    return [
+        {
+            "id": patient.id,
+            "full_name": patient.full_name,
+            "email": patient.email,
+            "appointments": appointments[patient.id],
+            "appointment_count": counts[patient.id],
+        }
+        for patient in patients
+    ]
 
 @router.get("/patients", response_model=PaginatedResponse[PatientWithAppointments])
 async def get_patients_list_with_filters(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    paging: PageParams = Depends(),
     full_name: str = Query(None),
+    fuzzy: bool = Query(False, description="Fuzzy full_name match ranked by relevance (no cursor paging)"),
+    appointments_per_patient: int = Query(APPOINTMENTS_PER_PATIENT, ge=1, le=50),
+    status: Optional[AppointmentStatus] = Query(None, description="Only nest appointments with this status"),
+    start_date: Optional[date] = Query(None, description="Only nest appointments on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only nest appointments on or before this date"),
 ):
-    skip = (page - 1) * limit
 
-    if current_user.user_type == UserType.admin:
-        query = db.query(User).filter(User.user_type == UserType.patient)
+    appointment_filters = []
+    if status:
+        appointment_filters.append(Appointment.status == status)
+    if start_date:
+        appointment_filters.append(Appointment.appointment_datetime >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        appointment_filters.append(Appointment.appointment_datetime <= datetime.combine(end_date, datetime.max.time()))
 
-        #  Apply full_name filter
-        if full_name:
-            query = query.filter(User.full_name.ilike(f"%{full_name}%"))
+    name_filter, rank_by = None, None
+    if full_name:
+        name_filter, rank_by = name_search(db.get_bind().dialect.name, User.full_name, full_name, fuzzy)
 
-        total = query.count()
-        total_pages = ceil(total / limit)
+    if current_user.user_type == UserType.admin:
+        query = select(User).filter(User.user_type == UserType.patient)
 
-        patients = query.options(
-            joinedload(User.appointments).joinedload(Appointment.doctor)
-        ).order_by(User.full_name).offset(skip).limit(limit).all()
+        #  Apply full_name filter
+        if name_filter is not None:
+            query = query.filter(name_filter)
 
-        return PaginatedResponse(
-            data=patients,
-            total=total,
-            page=page,
-            limit=limit,
-            total_pages=total_pages,
+        # LIMIT applies to patients; their appointments come capped from a second query
+        patients, total, total_exact, next_cursor = await paginate(
+            db, query, [User.full_name, User.id], paging, rank_by=rank_by
         )
+        data = await load_recent_appointments(db, patients, appointments_per_patient, appointment_filters)
+
+        return page_response(PatientWithAppointments, data, total, paging.page, paging.limit, total_exact, next_cursor)
 
     elif current_user.user_type == UserType.doctor:
         patient_ids_query = (
-            db.query(Appointment.patient_id)
+            select(Appointment.patient_id)
             .filter(Appointment.doctor_id == current_user.id)
             .distinct()
         )
@@ -166,27 +229,21 @@ async def get_patients_list_with_filters(
         if full_name:
             # Join patient info to apply full_name filter
             patient_ids_query = patient_ids_query.join(User, Appointment.patient_id == User.id)
-            patient_ids_query = patient_ids_query.filter(User.full_name.ilike(f"%{full_name}%"))
-
-        total = patient_ids_query.count()
-        total_pages = ceil(total / limit)
-
-        patient_ids = patient_ids_query.order_by(Appointment.patient_id).offset(skip).limit(limit).all()
-        patient_ids = [pid for (pid,) in patient_ids]
-
-        patients = db.query(User).filter(User.id.in_(patient_ids)).options(
-            joinedload(User.appointments.and_(
-                Appointment.doctor_id == current_user.id
-            )).joinedload(Appointment.doctor)
-        ).all()
-
-        return PaginatedResponse(
-            data=patients,
-            total=total,
-            page=page,
-            limit=limit,
-            total_pages=total_pages,
+            patient_ids_query = patient_ids_query.filter(name_filter)
+
+        patient_id_rows, total, total_exact, next_cursor = await paginate(
+            db, patient_ids_query, [Appointment.patient_id], paging, scalars=False
+        )
+        patient_ids = [pid for (pid,) in patient_id_rows]
+
+        result = await db.execute(select(User).filter(User.id.in_(patient_ids)).order_by(User.id))
+        patients = result.scalars().all()
+        data = await load_recent_appointments(
+            db, patients, appointments_per_patient,
+            [Appointment.doctor_id == current_user.id, *appointment_filters],
         )
 
+        return page_response(PatientWithAppointments, data, total, paging.page, paging.limit, total_exact, next_cursor)
+
     else:
         raise HTTPException(status_code=403, detail="Not authorized to view patients")
\ No newline at end of file
@@ -26,11 +26,13 @@ class ScheduleResponse(BaseModel):
 
 
 class ScheduleResponse(BaseModel):
-    id: int
+    # id is None for slots expanded from a recurring rule that are not booked yet
+    id: Optional[int]
     date: date
     start_time: time
     end_time: time
     status: str
+    rule_id: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -48,3 +50,45 @@ class DoctorBasicInfo(BaseModel):
 
     # Add schedules list here:
     schedule: List[ScheduleResponse] = []
+
+
+class AvailableSlot(BaseModel):
+    # id is None for slots expanded from a recurring rule that are not booked yet
+    id: Optional[int]
+    rule_id: Optional[int] = None
+    date: date
+    start_time: time
+    end_time: time
+    doctor_id: int
+    full_name: str
+    division: Optional[str]
+    district: Optional[str]
+    thana: Optional[str]
+    consultation_fee: Optional[int]
+
+
+class ScheduleRuleCreate(BaseModel):
+    weekday: int = Field(ge=0, le=6, description="0 = Monday ... 6 = Sunday")
+    start_time: time = Field(example="09:00:00")
+    end_time: time = Field(example="13:00:00")
+    slot_minutes: int = Field(gt=0, le=480, example=15)
+    effective_from: date
+    effective_to: Optional[date] = None
+    exceptions: List[date] = []
+
+class ScheduleRuleExceptionCreate(BaseModel):
+    date: date
+
+class ScheduleRuleResponse(BaseModel):
+    id: int
+    doctor_id: int
+    weekday: int
+    start_time: time
+    end_time: time
+    slot_minutes: int
+    effective_from: date
+    effective_to: Optional[date]
+    exception_dates: List[date] = []
+
+    class Config:
+        orm_mode = True
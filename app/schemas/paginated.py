@@ -6,7 +6,12 @@ T = TypeVar("T")
 
 class PaginatedResponse(GenericModel, Generic[T]):
     data: List[T]
-    total: int
+    # total/total_pages are None in cursor mode unless the count was requested
+    total: Optional[int]
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int]
+    # False when total is the optimizer's estimate (exact=false)
+    total_exact: bool = True
+    # Pass as `cursor` to fetch the following page with a keyset query
+    next_cursor: Optional[str] = None
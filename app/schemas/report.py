@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+
+class MonthlyDoctorStatsResponse(BaseModel):
+    doctor_id: int
+    full_name: str
+    month: date
+    total_appointments: int
+    total_patients: int
+    total_earned: int
+    generated_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -80,7 +80,9 @@ class PatientWithAppointments(BaseModel):
     id: int
     full_name: str
     email: str
+    # Most recent appointments only; appointment_count is the total that matched the filters
     appointments: List[AppointmentBasic] = []
+    appointment_count: int = 0
 
     class Config:
         orm_mode = True
\ No newline at end of file
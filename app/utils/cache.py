@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+# All caches by name, so their counters can be exported from one place
+caches = {}
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after `ttl` seconds.
+
+    Also the reference cache backend: get/set/delete/clear/stats is all ResponseCache needs,
+    so a shared store (e.g. Redis) can replace it behind the same methods.
+    """
+
+    def __init__(self, name: str, max_size: int = 1024, ttl: float = 60, register: bool = True):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if register:
+            caches[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """Cache of serialized responses grouped by an owner key (e.g. a doctor id).
+
+    Every entry key embeds the owner's version as read from the database (resource_versions),
+    so a committed write makes every process stop using the owner's old entries; they are
+    never looked up again and age out through the backend's TTL and LRU eviction.
+    Read the version before the data: a write that lands in between then leaves newer data
+    under the older version instead of stale data under the newer one.
+    """
+
+    def __init__(self, name: str, backend=None, max_size: int = 1024, ttl: float = 60):
+        self.name = name
+        self.backend = backend if backend is not None else TTLCache(name, max_size, ttl, register=False)
+        self.hits = 0
+        self.misses = 0
+        caches[name] = self
+
+    def key(self, owner, version, params) -> str:
+        return f"{self.name}:{owner}:{version!r}:{params!r}"
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        backend_stats = self.backend.stats()
+        return {
+            "size": backend_stats.get("size"),
+            "max_size": backend_stats.get("max_size"),
+            "ttl": backend_stats.get("ttl"),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": backend_stats.get("evictions"),
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,123 @@
+import os
+from datetime import date, timedelta
+from typing import Iterable
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.database import engine, async_engine, publish_versions
+from app.models.doctor_daily_availability import DoctorDailyAvailability
+from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
+from app.models.doctor_schedule_rule import DoctorScheduleRule
+from app.models.resource_version import ResourceVersion
+from app.utils.schedule_rules import active_rules_query, expand_rule
+from app.utils.versions import DOCTOR_SCHEDULES_VERSION, counted_table_versions, doctor_schedules_version
+
+# Rule-generated slots are summarized up to this many days ahead; the reconcile job moves the
+# horizon forward every day. Further out, only days some write refreshed count them.
+DAILY_AVAILABILITY_HORIZON_DAYS = int(os.getenv("DAILY_AVAILABILITY_HORIZON_DAYS", "60"))
+
+def open_days(conn: Connection, doctor_id: int, dates: list) -> dict:
+    """{date: (open_slot_count, first_open_time)} for the `dates` on which `doctor_id` has an open slot.
+
+    Open slots are the stored available rows plus the slots the doctor's rules generate that
+    have no row yet (a stored row of any status hides the rule slot it materializes).
+    """
+    # READ COMMITTED: the latest committed slots, read without locking them
+    stored = conn.execute(
+        select(DoctorSchedule.date, DoctorSchedule.start_time, DoctorSchedule.end_time, DoctorSchedule.status)
+        .filter(DoctorSchedule.doctor_id == doctor_id, DoctorSchedule.date.in_(dates))
+    ).all()
+    taken = {(day, start_time, end_time) for day, start_time, end_time, _ in stored}
+    open_slots = [(day, start_time) for day, start_time, _, status in stored if status == ScheduleStatus.available]
+
+    wanted = set(dates)
+    with Session(bind=conn) as session:
+        rules = session.execute(active_rules_query([doctor_id], min(dates), max(dates))).scalars().all()
+        for rule in rules:
+            for day, start_time, end_time in expand_rule(rule, min(dates), max(dates)):
+                if day in wanted and (day, start_time, end_time) not in taken:
+                    taken.add((day, start_time, end_time))
+                    open_slots.append((day, start_time))
+
+    days = {}
+    for day, start_time in open_slots:
+        count, first = days.get(day, (0, start_time))
+        days[day] = (count + 1, min(first, start_time))
+    return days
+
+def refresh_rows(conn: Connection, doctor_id: int, dates: list):
+    # Bumping the doctor's counter first serializes refreshes of one doctor, and moves the ETags
+    # again now that the summary matches the slots
+    bump = insert(ResourceVersion).values(name=doctor_schedules_version(doctor_id), version=1)
+    conn.execute(bump.on_duplicate_key_update(version=ResourceVersion.version + 1))
+
+    days = open_days(conn, doctor_id, dates)
+    if days:
+        upsert = insert(DoctorDailyAvailability).values([
+            {"doctor_id": doctor_id, "date": day, "open_slot_count": count, "first_open_time": first}
+            for day, (count, first) in days.items()
+        ])
+        conn.execute(upsert.on_duplicate_key_update(
+            open_slot_count=upsert.inserted.open_slot_count,
+            first_open_time=upsert.inserted.first_open_time,
+        ))
+    closed_days = set(dates) - set(days)
+    if closed_days:
+        # Rows exist only for open days; READ COMMITTED takes no gap lock for days without a row
+        conn.execute(
+            delete(DoctorDailyAvailability)
+            .where(DoctorDailyAvailability.doctor_id == doctor_id, DoctorDailyAvailability.date.in_(closed_days))
+        )
+
+def rule_dates(rule: DoctorScheduleRule) -> list:
+    """The days from today to the horizon whose summary `rule` affects; refresh them after a rule write."""
+    first = max(date.today(), rule.effective_from)
+    last = date.today() + timedelta(days=DAILY_AVAILABILITY_HORIZON_DAYS)
+    if rule.effective_to:
+        last = min(last, rule.effective_to)
+    day = first + timedelta(days=(rule.weekday - first.weekday()) % 7)
+    dates = []
+    while day <= last:
+        dates.append(day)
+        day += timedelta(days=7)
+    return dates
+
+def publish_summary_writes():
+    # The refresh commits after the schedule write it follows, so the collection moves again
+    # now that the summary matches, as the doctor's own counter did in refresh_rows
+    publish_versions(counted_table_versions([DoctorDailyAvailability.__tablename__]) | {DOCTOR_SCHEDULES_VERSION})
+
+async def refresh_daily_availability(doctor_id: int, dates: Iterable[date]):
+    """Recompute the doctor_daily_availability rows of `doctor_id` for `dates`; call after the write commits.
+
+    Runs in its own short READ COMMITTED transaction that upserts open days and deletes closed
+    ones, so it neither locks the slots nor takes gap locks, and concurrent bookings and
+    cancellations on one day cannot deadlock on it. If it fails, the summary for those days
+    stays stale until their next write or the reconcile job (app.jobs.daily_availability).
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    try:
+        async with async_engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="READ COMMITTED")
+            async with conn.begin():
+                await conn.run_sync(refresh_rows, doctor_id, dates)
+    except Exception as e:
+        print("❌ Could not refresh daily availability:", e)
+        return
+    publish_summary_writes()
+
+def refresh_daily_availability_sync(doctor_id: int, dates: Iterable[date]):
+    """refresh_daily_availability for sync callers (seeders, jobs)."""
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="READ COMMITTED")
+        with conn.begin():
+            refresh_rows(conn, doctor_id, dates)
+    publish_summary_writes()
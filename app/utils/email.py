@@ -1,5 +1,12 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from pydantic import EmailStr
+import asyncio
+import os
+import time
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+from typing import List, NamedTuple
+
+import aiosmtplib
+from fastapi_mail import MessageSchema, ConnectionConfig
 
 conf = ConnectionConfig(
     MAIL_USERNAME="your-email@example.com",
@@ -13,13 +20,142 @@ conf = ConnectionConfig(
 
 )
 
-fm = FastMail(conf)
+# Bulk sending (send_many): parallel SMTP sessions, messages/second across all of them (0 = unlimited)
+MAIL_CONCURRENCY = int(os.getenv("MAIL_CONCURRENCY", "5"))
+MAIL_RATE_PER_SECOND = float(os.getenv("MAIL_RATE_PER_SECOND", "10"))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", "3"))
+MAIL_RETRY_BACKOFF_SECONDS = float(os.getenv("MAIL_RETRY_BACKOFF_SECONDS", "1"))
+
+class OutgoingEmail(NamedTuple):
+    subject: str
+    recipients: List[str]
+    body: str
+
+class RateLimiter:
+    """Spaces calls to wait() at least 1/rate seconds apart, across all tasks of one event loop."""
 
-async def send_email(subject: str, recipients: list[EmailStr], body: str):
-    message = MessageSchema(
-        subject=subject,
-        recipients=recipients,
-        body=body,
-        subtype="html"
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second > 0 else 0
+        self._next = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def open_smtp() -> aiosmtplib.SMTP:
+    """An SMTP session configured like FastMail's, kept open for many messages."""
+    smtp = aiosmtplib.SMTP(
+        hostname=conf.MAIL_SERVER,
+        timeout=conf.TIMEOUT,
+        port=conf.MAIL_PORT,
+        use_tls=conf.MAIL_SSL_TLS,
+        start_tls=conf.MAIL_STARTTLS,
+        validate_certs=conf.VALIDATE_CERTS,
     )
-    await fm.send_message(message)
+    await smtp.connect()
+    if conf.USE_CREDENTIALS:
+        await smtp.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD)
+    return smtp
+
+async def close_smtp(smtp: aiosmtplib.SMTP):
+    try:
+        await smtp.quit()
+    except aiosmtplib.SMTPException:
+        smtp.close()
+
+def build_message(email: OutgoingEmail) -> EmailMessage:
+    """The MIME message for `email`, built with the standard library (FastMail only sends its own)."""
+    # MessageSchema validates the recipients; an invalid one fails just this message
+    schema = MessageSchema(subject=email.subject, recipients=email.recipients, body=email.body, subtype="html")
+    message = EmailMessage()
+    message["Subject"] = schema.subject
+    message["From"] = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM)) if conf.MAIL_FROM_NAME else conf.MAIL_FROM
+    message["To"] = ", ".join(schema.recipients)
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid()
+    message.set_content(schema.body, subtype="html")
+    return message
+
+def is_permanent_failure(error: Exception) -> bool:
+    """True for failures a retry will not fix: 5xx SMTP replies and errors that are not SMTP or network ones
+    (e.g. a message that fails validation)."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return min(refused.code for refused in error.recipients) >= 500
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+    return not isinstance(error, (aiosmtplib.SMTPException, OSError))
+
+async def send_many(
+    emails: List[OutgoingEmail],
+    concurrency: int = MAIL_CONCURRENCY,
+    rate_per_second: float = MAIL_RATE_PER_SECOND,
+    max_retries: int = MAIL_MAX_RETRIES,
+) -> dict:
+    """Send `emails` over at most `concurrency` reused SMTP sessions.
+
+    Each worker keeps one session open for all of its messages and reconnects after a
+    connection failure. Transient failures are retried with exponential backoff up to
+    `max_retries` times; 5xx replies and non-SMTP errors fail the message at once.
+    Returns {"sent": n, "failed": [(email, error), ...]}.
+    """
+    queue = asyncio.Queue()
+    for email in emails:
+        queue.put_nowait(email)
+    limiter = RateLimiter(rate_per_second)
+    sent, failed = 0, []
+
+    async def worker():
+        nonlocal sent
+        smtp = None
+        try:
+            while not queue.empty():
+                email = queue.get_nowait()
+                for attempt in range(max_retries + 1):
+                    await limiter.wait()
+                    try:
+                        message = build_message(email)
+                        if not conf.SUPPRESS_SEND:
+                            if smtp is None:
+                                smtp = await open_smtp()
+                            await smtp.send_message(message)
+                        sent += 1
+                        break
+                    except (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPResponseException) as error:
+                        # The session itself is still fine after a refusal
+                        if is_permanent_failure(error):
+                            failed.append((email, error))
+                            break
+                        if attempt == max_retries:
+                            failed.append((email, error))
+                        else:
+                            await asyncio.sleep(MAIL_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                    except (aiosmtplib.SMTPException, OSError) as error:
+                        # The session may be unusable now; the next attempt opens a fresh one
+                        if smtp is not None:
+                            smtp.close()
+                            smtp = None
+                        if attempt == max_retries:
+                            failed.append((email, error))
+                        else:
+                            await asyncio.sleep(MAIL_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                    except Exception as error:
+                        # Anything else (e.g. a recipient MessageSchema rejects) fails just this
+                        # message, permanently; the worker carries on with a fresh session
+                        if smtp is not None:
+                            smtp.close()
+                            smtp = None
+                        failed.append((email, error))
+                        break
+        finally:
+            if smtp is not None:
+                await close_smtp(smtp)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(emails)))))
+    return {"sent": sent, "failed": failed}
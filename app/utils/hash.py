@@ -1,9 +1,58 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is CPU bound, so async callers hash in a dedicated process pool
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+
+# Forking the server, which runs threads (scheduler, thread pools), could copy a lock some other
+# thread holds into a worker that then never gets it; workers come from a fork server instead
+HASH_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor = None
+_pending = 0
+
+class HashingOverloaded(Exception):
+    """Raised when more than HASH_MAX_PENDING hash jobs are queued."""
+
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context(HASH_START_METHOD)
+        )
+    return _executor
+
+async def _run_in_pool(func, *args):
+    global _pending
+    # Shed load instead of letting the queue (and every caller's latency) grow unbounded
+    if _pending >= HASH_MAX_PENDING:
+        raise HashingOverloaded()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password_async(password: str):
+    return await _run_in_pool(hash_password, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,49 @@
+from sqlalchemy import Float, bindparam, case
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+
+# MySQL's default ngram_token_size; shorter terms have no tokens in the FULLTEXT index
+NGRAM_TOKEN_SIZE = 2
+
+class MatchAgainst(ColumnElement):
+    """MATCH (column) AGAINST (term [IN BOOLEAN MODE]); evaluates to the FULLTEXT relevance."""
+    type = Float()
+
+    def __init__(self, column, term: str, boolean: bool = False):
+        self.column = column
+        self.term = bindparam(None, term, unique=True)
+        self.boolean = boolean
+
+@compiles(MatchAgainst)
+def compile_match_against(element, compiler, **kw):
+    mode = " IN BOOLEAN MODE" if element.boolean else ""
+    return "MATCH (%s) AGAINST (%s%s)" % (
+        compiler.process(element.column, **kw), compiler.process(element.term, **kw), mode
+    )
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def name_search(dialect_name: str, column, term: str, fuzzy: bool = False):
+    """Indexed name filter; returns (criterion, rank_by).
+
+    On MySQL the ngram FULLTEXT index (ft_users_full_name, built with innodb_ft_enable_stopword=OFF,
+    see README) serves substring matches as a phrase search, and fuzzy matches as a natural-language search over shared character pairs. Terms
+    shorter than an ngram fall back to a prefix LIKE on ix_users_type_full_name. `rank_by` orders
+    prefix matches first, then by relevance, and is only set for fuzzy searches.
+    """
+    term = term.strip()
+    prefix_match = column.like(escape_like(term) + "%", escape="\\")
+
+    if dialect_name != "mysql":
+        return column.ilike(f"%{escape_like(term)}%", escape="\\"), ([case((prefix_match, 1), else_=0).desc()] if fuzzy else None)
+
+    if len(term) < NGRAM_TOKEN_SIZE:
+        return prefix_match, None
+
+    if fuzzy:
+        relevance = MatchAgainst(column, term)
+        return relevance > 0, [case((prefix_match, 1), else_=0).desc(), relevance.desc()]
+
+    phrase = '"%s"' % term.replace('"', " ")
+    return MatchAgainst(column, phrase, boolean=True) > 0, None
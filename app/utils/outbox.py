@@ -0,0 +1,13 @@
+from typing import List
+
+from app.models.email_outbox import EmailOutbox
+
+def outbox_row(subject: str, recipients: List[str], body: str) -> dict:
+    """Values for a bulk insert into email_outbox."""
+    return {"subject": subject, "recipients": ",".join(recipients), "body": body}
+
+def enqueue_email(db, subject: str, recipients: List[str], body: str) -> EmailOutbox:
+    """Queue an email in `db`'s transaction (sync or async session); it is sent only if that transaction commits."""
+    email = EmailOutbox(**outbox_row(subject, recipients, body))
+    db.add(email)
+    return email
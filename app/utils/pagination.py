@@ -0,0 +1,194 @@
+import base64
+import json
+import os
+from datetime import date, datetime, time
+from typing import List, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, or_, select, func, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.util import find_tables
+
+from app.utils.cache import TTLCache
+from app.utils.versions import COUNTED_TABLES, get_versions, table_version
+
+# Exact totals by normalized query. Keys embed the tables' resource_versions counters, so a
+# committed write invalidates them in every process. The counters are bumped just after the
+# commit, so a process that dies in between leaves totals stale until the TTL.
+count_cache = TTLCache(
+    "page_counts",
+    max_size=int(os.getenv("COUNT_CACHE_MAX_SIZE", "4096")),
+    ttl=float(os.getenv("COUNT_CACHE_TTL_SECONDS", "60")),
+)
+
+class PageParams:
+    """Paging query parameters shared by every paginated endpoint; use as `Depends()`."""
+
+    def __init__(
+        self,
+        page: int = Query(1, ge=1),
+        limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page; switches to keyset paging"),
+        with_total: bool = Query(False, description="Also count the total in cursor mode"),
+        exact: bool = Query(True, description="Set to false for a cheaper estimated total"),
+    ):
+        self.page = page
+        self.limit = limit
+        self.cursor = cursor
+        self.with_total = with_total
+        self.exact = exact
+
+    def key(self) -> tuple:
+        """The parameters as a tuple, for ETags and cache keys."""
+        return self.page, self.limit, self.cursor, self.with_total, self.exact
+
+class Explain(Executable, ClauseElement):
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain)
+def compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+def encode_cursor(values) -> str:
+    raw = [value.isoformat() if isinstance(value, (date, datetime, time)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+def decode_cursor(cursor: str, sort_columns) -> list:
+    """Decode a cursor produced by encode_cursor back into typed values for `sort_columns`."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(raw, list) or len(raw) != len(sort_columns):
+            raise ValueError
+        values = []
+        for column, value in zip(sort_columns, raw):
+            if value is None:
+                # A NULL sort key (e.g. a user without full_name) stays NULL, not the string "None"
+                if not column.nullable:
+                    raise ValueError
+                values.append(None)
+                continue
+            python_type = column.type.python_type
+            if python_type in (date, datetime, time):
+                values.append(python_type.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after_keyset(sort_columns, values, descending: bool = False):
+    """WHERE clause for rows strictly after `values` in (sort_columns) order.
+
+    Expanded to (a > x) OR (a = x AND b > y) ... rather than a row-value comparison,
+    which MySQL cannot turn into an index range scan. NULL sorts lowest, as in MySQL:
+    first in ascending order and last in descending order.
+    """
+    clauses = []
+    for i, column in enumerate(sort_columns):
+        equal_prefix = [key_equals(sort_columns[j], values[j]) for j in range(i)]
+        clauses.append(and_(*equal_prefix, key_beyond(column, values[i], descending)))
+    return or_(*clauses)
+
+def key_equals(column, value):
+    return column.is_(None) if value is None else column == value
+
+def key_beyond(column, value, descending: bool):
+    """Rows whose `column` sorts strictly after `value`; `column > NULL` alone would match nothing."""
+    if value is None:
+        # Ascending, every non-NULL value follows NULL; descending, nothing does
+        return false() if descending else column.isnot(None)
+    if descending:
+        return or_(column < value, column.is_(None)) if column.nullable else column < value
+    return column > value
+
+def row_cursor(row, sort_columns) -> str:
+    return encode_cursor([getattr(row, column.key) for column in sort_columns])
+
+async def estimate_rows(db: AsyncSession, query) -> Optional[int]:
+    """Row estimate from the MySQL optimizer (EXPLAIN), without scanning the rows.
+
+    None when a plan row has no estimate (e.g. "Select tables optimized away", where the
+    optimizer answers from the index alone, so an exact count is cheap anyway).
+    """
+    result = await db.execute(Explain(query))
+    estimate = 1.0
+    for row in result.mappings().all():
+        if row["select_type"] in ("SIMPLE", "PRIMARY"):
+            if row["rows"] is None:
+                return None
+            estimate *= row["rows"] * float(row["filtered"] or 100) / 100
+    return int(estimate)
+
+async def count_rows(db: AsyncSession, query, exact: bool = True):
+    """Total rows of `query`; returns (total, is_exact).
+
+    Exact totals of queries over COUNTED_TABLES are cached per normalized statement and
+    parameters until one of the tables it reads is written. With exact=False on MySQL the optimizer estimate is used
+    when it has one; otherwise the exact count is returned.
+    """
+    query = query.order_by(None)
+    if not exact and db.get_bind().dialect.name == "mysql":
+        # Wrapping in the count subquery drops eager-load joins, as for the exact count
+        estimate = await estimate_rows(db, select(func.count()).select_from(query.subquery()))
+        if estimate is not None:
+            return estimate, False
+
+    tables = tuple(sorted({table.name for table in find_tables(query, include_joins=True)}))
+    if not COUNTED_TABLES.issuperset(tables):
+        # Writes to these tables publish no counter, so there is nothing to invalidate a cached count
+        return await db.scalar(select(func.count()).select_from(query.subquery())), True
+
+    compiled = query.compile()
+    key = (
+        str(compiled),
+        repr(sorted(compiled.params.items())),
+        tables,
+        await get_versions(db, *[table_version(table) for table in tables]),
+    )
+    total = count_cache.get(key)
+    if total is None:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        count_cache.set(key, total)
+    return total, True
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    sort_columns,
+    paging: PageParams,
+    descending: bool = False,
+    scalars: bool = True,
+    rank_by=None,
+):
+    """Fetch the page of `query` ordered by `sort_columns` that `paging` asks for.
+
+    With a cursor the page is a single indexed range query starting after the cursor
+    and the total is only counted when `with_total` is set; otherwise OFFSET paging is
+    used as before. Returns (rows, total, total_exact, next_cursor).
+
+    `rank_by` expressions (e.g. search relevance) are ordered ahead of `sort_columns`.
+    They are not part of the keyset, so ranked pages are OFFSET-only and have no next_cursor.
+    """
+    cursor, limit = paging.cursor, paging.limit
+    if rank_by and cursor is not None:
+        raise HTTPException(status_code=400, detail="Cursor paging is not available for ranked results")
+
+    total, total_exact = None, True
+    if cursor is None or paging.with_total:
+        total, total_exact = await count_rows(db, query, paging.exact)
+
+    page_query = query.order_by(*(rank_by or []), *[column.desc() if descending else column for column in sort_columns])
+    if cursor is not None:
+        page_query = page_query.filter(after_keyset(sort_columns, decode_cursor(cursor, sort_columns), descending))
+    else:
+        page_query = page_query.offset((paging.page - 1) * limit)
+
+    # One extra row tells us whether a next page exists without another query
+    result = (await db.execute(page_query.limit(limit + 1))).unique()
+    rows: List = result.scalars().all() if scalars else result.all()
+
+    next_cursor = row_cursor(rows[limit - 1], sort_columns) if len(rows) > limit and not rank_by else None
+    return rows[:limit], total, total_exact, next_cursor
@@ -0,0 +1,54 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.doctor_schedule_rule import DoctorScheduleRule
+
+def active_rules_query(doctor_ids, start_date: date, end_date: date):
+    """Rules of the given doctors whose effective range overlaps [start_date, end_date]."""
+    return select(DoctorScheduleRule).filter(
+        DoctorScheduleRule.doctor_id.in_(doctor_ids),
+        DoctorScheduleRule.effective_from <= end_date,
+        or_(DoctorScheduleRule.effective_to.is_(None), DoctorScheduleRule.effective_to >= start_date),
+    )
+
+async def load_active_rules(db: AsyncSession, doctor_ids, start_date: date, end_date: date):
+    result = await db.execute(active_rules_query(doctor_ids, start_date, end_date))
+    return result.scalars().all()
+
+def expand_rule(rule: DoctorScheduleRule, start_date: date, end_date: date) -> Iterable[Tuple[date, time, time]]:
+    """Yield (date, start_time, end_time) for every slot `rule` generates between the two dates, inclusive."""
+    first = max(start_date, rule.effective_from)
+    last = min(end_date, rule.effective_to) if rule.effective_to else end_date
+    skipped = {exception.date for exception in rule.exceptions}
+    step = timedelta(minutes=rule.slot_minutes)
+
+    day = first + timedelta(days=(rule.weekday - first.weekday()) % 7)
+    while day <= last:
+        if day not in skipped:
+            slot_start = datetime.combine(day, rule.start_time)
+            rule_end = datetime.combine(day, rule.end_time)
+            while slot_start + step <= rule_end:
+                yield day, slot_start.time(), (slot_start + step).time()
+                slot_start += step
+        day += timedelta(days=7)
+
+def find_rule_slot(rules: Iterable[DoctorScheduleRule], at: datetime) -> Optional[Tuple[DoctorScheduleRule, time, time]]:
+    """Return (rule, start_time, end_time) of the generated slot containing `at`, if any."""
+    day = at.date()
+    for rule in rules:
+        if rule.weekday != day.weekday() or day < rule.effective_from:
+            continue
+        if rule.effective_to and day > rule.effective_to:
+            continue
+        if day in {exception.date for exception in rule.exceptions}:
+            continue
+
+        rule_start = datetime.combine(day, rule.start_time)
+        step = timedelta(minutes=rule.slot_minutes)
+        slot_start = rule_start + ((at - rule_start) // step) * step
+        if at >= rule_start and slot_start + step <= datetime.combine(day, rule.end_time):
+            return rule, slot_start.time(), (slot_start + step).time()
+    return None
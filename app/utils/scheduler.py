@@ -1,10 +1,167 @@
+import functools
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.jobs.reminder import send_appointment_reminders
+from apscheduler.schedulers.blocking import BlockingScheduler
+from sqlalchemy import update, func, or_, select, text
+from sqlalchemy.dialects.mysql import insert
+from app.database import engine
+from app.jobs.reminder import send_appointment_reminders, REMINDER_INTERVAL_MINUTES
 from app.jobs.monthly_report import generate_monthly_reports
+from app.jobs.email_outbox import drain_email_outbox, OUTBOX_POLL_SECONDS, OUTBOX_WORKERS
+from app.jobs.daily_availability import reconcile_daily_availability, DAILY_AVAILABILITY_RECONCILE_MINUTES
+from app.models.scheduler_lease import SchedulerLease, SchedulerJobRun
 
-scheduler = BackgroundScheduler()
+# Web workers start a scheduler too unless this is off (jobs then run only in `python -m app.worker`)
+RUN_SCHEDULER_IN_WEB = os.getenv("RUN_SCHEDULER_IN_WEB", "true").lower() == "true"
+# A leader that stops renewing for this long is replaced by another process
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+LEASE_NAME = "scheduler"
+
+# Identifies this process as a lease holder
+instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+scheduler = None
+# Leader-only jobs (by name, also their scheduler job id) that run late rather than not at all
+catch_up_jobs = set()
+# Catch-up jobs running in this process right now
+running_jobs = set()
+
+def acquire_lease() -> bool:
+    """Take or renew the scheduler lease; True while this process is the leader.
+
+    Expiry is computed with the database clock, so hosts with skewed clocks agree on it.
+    """
+    with engine.begin() as conn:
+        result = conn.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.name == LEASE_NAME,
+                or_(SchedulerLease.holder == instance_id, SchedulerLease.expires_at < func.now()),
+            )
+            .values(
+                holder=instance_id,
+                expires_at=func.timestampadd(text("SECOND"), SCHEDULER_LEASE_SECONDS, func.now()),
+            )
+        )
+        return result.rowcount == 1
+
+def release_lease():
+    """Hand the lease over right away instead of letting it expire (clean shutdown)."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == LEASE_NAME, SchedulerLease.holder == instance_id)
+                .values(holder=None, expires_at=func.now())
+            )
+    except Exception as e:
+        print("❌ Could not release scheduler lease:", e)
+
+def leader_only(job, catch_up: bool = False):
+    """Run `job` only in the process that holds the lease; every other process skips it.
+
+    With catch_up, each run is recorded in scheduler_job_runs, and the leader runs the job as
+    soon as it sees a fire time passed since then (catch_up_missed_runs): a cron run skipped
+    because the leader died just before it, or because it misfired, happens late instead of never.
+    """
+    @functools.wraps(job)
+    def run():
+        try:
+            is_leader = acquire_lease()
+        except Exception as e:
+            print("❌ Could not check scheduler lease, skipping", job.__name__, e)
+            return
+        if not is_leader:
+            return
+        if not catch_up:
+            job()
+            return
+        started_at = datetime.now(timezone.utc)
+        running_jobs.add(job.__name__)
+        try:
+            job()
+            record_run(job.__name__, started_at)
+        finally:
+            running_jobs.discard(job.__name__)
+
+    if catch_up:
+        catch_up_jobs.add(job.__name__)
+    return run
+
+def record_run(name: str, started_at: datetime):
+    try:
+        with engine.begin() as conn:
+            upsert = insert(SchedulerJobRun).values(name=name, last_run_at=started_at.replace(tzinfo=None))
+            conn.execute(upsert.on_duplicate_key_update(last_run_at=upsert.inserted.last_run_at))
+    except Exception as e:
+        print("❌ Could not record scheduler job run:", name, e)
+
+def catch_up_missed_runs():
+    """In the leader: run now every catch-up job whose next fire time after its last recorded run has passed."""
+    now = datetime.now(timezone.utc)
+    with engine.connect() as conn:
+        last_runs = dict(conn.execute(select(SchedulerJobRun.name, SchedulerJobRun.last_run_at)).all())
+    for name in sorted(catch_up_jobs - running_jobs):
+        job = scheduler.get_job(name) if scheduler is not None else None
+        if job is None:
+            continue
+        last_run = last_runs.get(name)
+        if last_run is None:
+            # Never recorded (first start with this job): no run has been missed yet
+            record_run(name, now)
+            continue
+        due = job.trigger.get_next_fire_time(last_run.replace(tzinfo=timezone.utc), now)
+        if due is not None and due <= now:
+            # The scheduler runs it on its own threads (once: max_instances stays 1); leader_only records it
+            job.modify(next_run_time=now)
+
+def renew_lease():
+    try:
+        is_leader = acquire_lease()
+    except Exception as e:
+        print("❌ Could not renew scheduler lease:", e)
+        return
+    if is_leader:
+        try:
+            catch_up_missed_runs()
+        except Exception as e:
+            print("❌ Could not catch up missed scheduler jobs:", e)
+
+def add_jobs(target):
+    # Renewing well within the lease keeps one stable leader while it is alive
+    target.add_job(renew_lease, 'interval', seconds=max(SCHEDULER_LEASE_SECONDS // 3, 1))
+    target.add_job(leader_only(send_appointment_reminders), 'interval', minutes=REMINDER_INTERVAL_MINUTES)
+    target.add_job(
+        leader_only(generate_monthly_reports, catch_up=True), 'cron', day=1, hour=1,      # 1st of month at 01:00
+        id=generate_monthly_reports.__name__,
+    )
+    target.add_job(leader_only(reconcile_daily_availability), 'interval', minutes=DAILY_AVAILABILITY_RECONCILE_MINUTES)
+    # Not leader-only: claims keep concurrent drainers (here and in other processes) off each other's rows
+    target.add_job(drain_email_outbox, 'interval', seconds=OUTBOX_POLL_SECONDS, max_instances=OUTBOX_WORKERS)
 
 def start():
-    scheduler.add_job(send_appointment_reminders, 'cron', hour=0, minute=0)  # Every day at 00:00
-    scheduler.add_job(generate_monthly_reports, 'cron', day=1, hour=1)        # 1st of month at 01:00
+    global scheduler
+    scheduler = BackgroundScheduler()
+    add_jobs(scheduler)
     scheduler.start()
+
+def shutdown():
+    if scheduler is None:
+        return
+    if scheduler.running:
+        # Let running jobs finish first: released under them, the lease (and their
+        # not yet recorded runs) would go to another process, which would run them again
+        scheduler.shutdown(wait=True)
+    release_lease()
+
+def run_forever():
+    global scheduler
+    scheduler = BlockingScheduler()
+    add_jobs(scheduler)
+    try:
+        scheduler.start()
+    finally:
+        shutdown()
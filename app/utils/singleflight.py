@@ -0,0 +1,68 @@
+import asyncio
+import os
+
+# All single-flight groups by name, so their counters can be exported from one place
+flights = {}
+
+# Routes that coalesce identical concurrent requests, e.g. SINGLE_FLIGHT_ROUTES=doctor_availability,doctors
+ENABLED_ROUTES = {name.strip() for name in os.getenv("SINGLE_FLIGHT_ROUTES", "doctor_availability").split(",") if name.strip()}
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one in-flight computation.
+
+    The first caller (leader) runs the computation; callers arriving while it is still
+    running await the same result or exception. Results are shared between requests,
+    so compute immutable values (e.g. a serialized body), not Response objects.
+    """
+
+    def __init__(self, name: str, enabled: bool = None):
+        self.name = name
+        self.enabled = name in ENABLED_ROUTES if enabled is None else enabled
+        self.leaders = 0
+        self.coalesced = 0
+        self._inflight = {}
+        flights[name] = self
+
+    async def do(self, key, compute):
+        if not self.enabled:
+            return await compute()
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader's request was cancelled (client went away); compute it ourselves
+                if not future.cancelled():
+                    raise
+                return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved, so asyncio does not log it when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        requests = self.leaders + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "executions": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+        }
@@ -0,0 +1,79 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.resource_version import ResourceVersion
+
+def doctor_schedules_version(doctor_id: int) -> str:
+    return f"doctor_schedules:{doctor_id}"
+
+def collection_version(collection: str) -> str:
+    return f"collections:{collection}"
+
+# Moves when any doctor's listed profile changes (patients' writes leave it alone)
+DOCTORS_VERSION = collection_version("doctors")
+# Moves when any doctor's schedule, or the availability summary built on it, changes
+DOCTOR_SCHEDULES_VERSION = collection_version("doctor_schedules")
+
+async def bump_versions(db: AsyncSession, *names: str):
+    """Increment the per-entity counters of `names` ("doctor_schedules:<doctor_id>") inside the
+    current transaction, so they move only if it commits.
+
+    The collection each belongs to ("collections:doctor_schedules") is bumped right after the
+    commit instead (bump_after_commit): every write of the collection moves it, so bumping it
+    inside the writers' transactions would serialize them on its row lock.
+    """
+    upsert = insert(ResourceVersion)
+    upsert = upsert.on_duplicate_key_update(version=ResourceVersion.version + 1)
+    # Sorted, so transactions bumping several counters lock them in the same order
+    await db.execute(upsert, [{"name": name, "version": 1} for name in sorted(set(names))])
+    bump_after_commit(db, *{collection_version(name.partition(":")[0]) for name in names})
+
+def bump_after_commit(db: AsyncSession, *names: str):
+    """Bump the counters of `names` in their own transaction once `db` commits (see app.database).
+
+    Nothing is bumped if it rolls back. A process that dies in between leaves the counters,
+    and the ETags built on them, unchanged until the next write.
+    """
+    db.info.setdefault("bump_after_commit", set()).update(names)
+
+# Tables whose "tables:<name>" counters key cached page counts (app.utils.pagination.count_rows).
+# Writes to any other table publish nothing, and counts reading one are not cached.
+COUNTED_TABLES = frozenset({"appointments", "doctor_daily_availability", "doctor_schedules", "users"})
+
+def table_version(table: str) -> str:
+    return f"tables:{table}"
+
+def counted_table_versions(tables) -> set:
+    """The "tables:<name>" counters to bump after a commit that wrote `tables`."""
+    return {table_version(table) for table in tables if table in COUNTED_TABLES}
+
+def versions_bump(names):
+    """Statement bumping the counters `names` (see app.database.publish_versions).
+
+    Runs in its own transaction right after the writing one commits, never inside it.
+    """
+    upsert = insert(ResourceVersion).values([{"name": name, "version": 1} for name in sorted(names)])
+    return upsert.on_duplicate_key_update(version=ResourceVersion.version + 1)
+
+async def get_versions(db: AsyncSession, *names: str) -> tuple:
+    result = await db.execute(select(ResourceVersion.name, ResourceVersion.version).where(ResourceVersion.name.in_(names)))
+    versions = dict(result.all())
+    return tuple(versions.get(name, 0) for name in names)
+
+def make_etag(*parts) -> str:
+    return '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the request's If-None-Match already names `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -0,0 +1,9 @@
+"""Background jobs in a process of their own: python -m app.worker
+
+Run it next to the web workers with RUN_SCHEDULER_IN_WEB=false. Several copies can run for
+failover; the scheduler lease makes sure each job still runs only once.
+"""
+from app.utils.scheduler import run_forever
+
+if __name__ == "__main__":
+    run_forever()
@@ -8,6 +8,7 @@ sys.path.insert(0, project_root)
 from app.database import SessionLocal
 from app.models.user import User
 from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
+from app.utils.daily_availability import refresh_daily_availability_sync
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -22,6 +23,7 @@ def seed_doctor_schedules():
             return
 
         # Clear old schedules
+        old_dates = {row.date for row in db.query(DoctorSchedule.date).filter(DoctorSchedule.doctor_id == doctor.id)}
         db.query(DoctorSchedule).filter(DoctorSchedule.doctor_id == doctor.id).delete()
 
         schedules = []
@@ -45,6 +47,8 @@ def seed_doctor_schedules():
 
         db.bulk_save_objects(schedules)
         db.commit()
+        # Keep the per-day summary behind GET /users/doctors?available_date= in step
+        refresh_daily_availability_sync(doctor.id, old_dates | {schedule.date for schedule in schedules})
         print(f"Seeded schedules for Dr. Alice Smith for {len(schedules)} slots.")
 
     except IntegrityError as e:
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import uuid
+from typing import List
+
+import pytest
+
+# Tokens are minted with the same settings the app reads; .env values still take precedence
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+
+import httpx
+from sqlalchemy import delete, inspect, or_, text
+
+from app.database import SessionLocal, async_engine, engine, finish_publishing
+from app.main import app
+from app.models.appoitment import Appointment
+from app.models.doctor_daily_availability import DoctorDailyAvailability
+from app.models.doctor_schedule import DoctorSchedule
+from app.models.doctor_schedule_rule import DoctorScheduleRule
+from app.models.email_outbox import EmailOutbox
+from app.models.resource_version import ResourceVersion
+from app.models.user import User, UserType
+from app.utils.jwt import create_access_token
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: load benchmark against MySQL, run only with RUN_BENCHMARKS=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks seed large tables and run for minutes; they are opt-in
+    if os.getenv("RUN_BENCHMARKS"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; set RUN_BENCHMARKS=1 to run it")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def mysql():
+    """The MySQL database configured by DATABASE_*, migrated with `alembic upgrade head`.
+
+    Tests that need it are skipped when it is not configured, not reachable or not migrated.
+    """
+    if not os.getenv("DATABASE_NAME"):
+        pytest.skip("DATABASE_* is not configured")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            migrated = inspect(conn).has_table("appointments")
+    except Exception as e:
+        pytest.skip(f"MySQL is not reachable: {e}")
+    if not migrated:
+        pytest.skip("Database is not migrated; run `alembic upgrade head`")
+    return engine
+
+
+def mobile_number() -> str:
+    return f"+880{uuid.uuid4().int % 10 ** 10:010d}"
+
+
+class SeedRows:
+    """Users a test module creates, with a session to add rows for them.
+
+    `cleanup` deletes the users and everything that hangs off them: appointments,
+    schedules, rules, summary rows, version counters and queued emails.
+    """
+
+    def __init__(self):
+        self.tag = uuid.uuid4().hex[:8]
+        self.db = SessionLocal()
+        self.user_ids: List[int] = []
+
+    def users(self, user_type: UserType, count: int = 1, **fields) -> List[User]:
+        """`count` new users of `user_type`, flushed so their ids are set."""
+        first = len(self.user_ids)
+        users = [
+            User(
+                full_name=f"Test {user_type.value} {self.tag} {n}", email=f"{user_type.value}-{self.tag}-{n}@tests.test",
+                mobile=mobile_number(), user_type=user_type, **{"password": "-", **fields},
+            )
+            for n in range(first, first + count)
+        ]
+        self.db.add_all(users)
+        self.db.flush()
+        self.user_ids += [user.id for user in users]
+        return users
+
+    def token(self, user: User) -> str:
+        return create_access_token({"sub": user.email, "user_id": user.id, "user_type": user.user_type}, 600)
+
+    def cleanup(self):
+        self.db.rollback()
+        ids = self.user_ids
+        statements = [
+            delete(EmailOutbox).where(EmailOutbox.recipients.like(f"%-{self.tag}-%")),
+            delete(Appointment).where(or_(Appointment.doctor_id.in_(ids), Appointment.patient_id.in_(ids))),
+            delete(DoctorDailyAvailability).where(DoctorDailyAvailability.doctor_id.in_(ids)),
+            delete(DoctorSchedule).where(DoctorSchedule.doctor_id.in_(ids)),
+            # Rule exceptions go with their rule (ON DELETE CASCADE)
+            delete(DoctorScheduleRule).where(DoctorScheduleRule.doctor_id.in_(ids)),
+            delete(ResourceVersion).where(ResourceVersion.name.in_([f"doctor_schedules:{user_id}" for user_id in ids])),
+            delete(User).where(User.id.in_(ids)),
+        ]
+        for statement in statements:
+            self.db.execute(statement.execution_options(synchronize_session=False))
+        self.db.commit()
+        self.db.close()
+
+
+@pytest.fixture(scope="module")
+def seed(mysql):
+    """SeedRows for the test module; everything it created is deleted after the module."""
+    rows = SeedRows()
+    yield rows
+    rows.cleanup()
+
+
+def call_api(requests, asgi_app=app):
+    """Run `await requests(client)` with an httpx client on the app (or `asgi_app`), in a fresh event loop."""
+    async def run():
+        try:
+            async with httpx.AsyncClient(app=asgi_app, base_url="http://test", timeout=60) as client:
+                return await requests(client)
+        finally:
+            # The pool's connections belong to this event loop
+            await finish_publishing()
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(scope="session")
+def api(mysql):
+    """call_api, for tests that drive the app against MySQL."""
+    return call_api
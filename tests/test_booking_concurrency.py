@@ -0,0 +1,100 @@
+"""Concurrent booking stress test: many patients race for the same slots through the API.
+
+Both stored slots and rule slots (materialized by their first booking) are raced.
+
+Needs MySQL (see conftest.mysql); the row locks and unique constraints under test are
+MySQL's. By default 300 patients race for one slot; tune the load with STRESS_SLOTS and
+STRESS_CONTENDERS.
+"""
+import asyncio
+import os
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.appoitment import Appointment, AppointmentStatus
+from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
+from app.models.doctor_schedule_rule import DoctorScheduleRule
+from app.models.user import UserType
+
+SLOTS = int(os.getenv("STRESS_SLOTS", "1"))
+CONTENDERS = int(os.getenv("STRESS_CONTENDERS", "300"))  # patients racing for every slot
+
+
+@pytest.fixture(params=["stored", "rule"])
+def booking_race(request, seed):
+    """A doctor with SLOTS open slots and CONTENDERS patients.
+
+    "stored" slots are doctor_schedules rows; "rule" slots come from a weekly rule and are
+    materialized by the first booking, so the race is also over inserting the row.
+    """
+    day = date.today() + timedelta(days=30)
+    doctor, = seed.users(UserType.doctor, consultation_fee=500)
+    patients = seed.users(UserType.patient, CONTENDERS)
+    slot_starts = [datetime.combine(day, time(9, 0)) + timedelta(minutes=15 * i) for i in range(SLOTS)]
+    if request.param == "stored":
+        seed.db.add_all([
+            DoctorSchedule(
+                doctor_id=doctor.id, date=day, start_time=start.time(),
+                end_time=(start + timedelta(minutes=15)).time(), status=ScheduleStatus.available,
+            )
+            for start in slot_starts
+        ])
+    else:
+        seed.db.add(DoctorScheduleRule(
+            doctor_id=doctor.id, weekday=day.weekday(), start_time=time(9, 0),
+            end_time=(slot_starts[-1] + timedelta(minutes=15)).time(), slot_minutes=15,
+            effective_from=date.today(),
+        ))
+    seed.db.commit()
+    return doctor.id, slot_starts, [seed.token(patient) for patient in patients]
+
+
+def book_all(api, doctor_id, slot_starts, tokens):
+    async def requests(client):
+        started = clock.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post(
+                "/api/appointments/",
+                json={"doctor_id": doctor_id, "appointment_datetime": start.isoformat(), "notes": "stress"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            for start in slot_starts
+            for token in tokens
+        ))
+        return responses, clock.perf_counter() - started
+
+    return api(requests)
+
+
+def test_concurrent_bookings_never_double_book(booking_race, api, record_property):
+    doctor_id, slot_starts, tokens = booking_race
+
+    responses, elapsed = book_all(api, doctor_id, slot_starts, tokens)
+
+    statuses = [response.status_code for response in responses]
+    booked = statuses.count(200)
+    with SessionLocal() as db:
+        per_slot = db.execute(
+            select(Appointment.appointment_datetime, func.count())
+            .filter(Appointment.doctor_id == doctor_id, Appointment.status != AppointmentStatus.cancelled)
+            .group_by(Appointment.appointment_datetime)
+        ).all()
+    double_booked = sum(count - 1 for _, count in per_slot if count > 1)
+
+    record_property("requests", len(responses))
+    record_property("bookings_per_second", round(len(responses) / elapsed, 1))
+    record_property("double_booked", double_booked)
+    print(
+        f"\n{len(responses)} booking requests in {elapsed:.2f}s "
+        f"({len(responses) / elapsed:.1f} req/s, {booked} booked, {double_booked} double-booked)"
+    )
+
+    assert double_booked == 0
+    assert len(per_slot) == len(slot_starts)
+    assert booked == len(slot_starts)
+    # Every losing request is a clean "already booked" / "not available", never a 500
+    assert set(statuses) <= {200, 400}
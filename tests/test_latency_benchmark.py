@@ -0,0 +1,95 @@
+"""Latency benchmark: p99 of fast requests while slow queries run, blocking vs async database access.
+
+Opt-in (RUN_BENCHMARKS=1, see conftest) and needs MySQL. LATENCY_BENCH_FAST_REQUESTS doctor
+listings are sent at a steady pace while LATENCY_BENCH_SLOW_REQUESTS requests each wait on a
+SELECT SLEEP(LATENCY_BENCH_SLOW_SECONDS). The slow requests run once the way routes used to
+(a sync session inside `async def`, which blocks the event loop) and once on the async engine.
+Latency counts from each request's scheduled start, so time spent waiting for a blocked loop
+to send it is included.
+"""
+import asyncio
+import os
+import statistics
+import time as clock
+
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal, get_async_db
+from app.main import app
+from app.models.user import UserType
+
+SLOW_SECONDS = float(os.getenv("LATENCY_BENCH_SLOW_SECONDS", "0.2"))
+SLOW_REQUESTS = int(os.getenv("LATENCY_BENCH_SLOW_REQUESTS", "20"))
+FAST_REQUESTS = int(os.getenv("LATENCY_BENCH_FAST_REQUESTS", "200"))
+
+# The app with one slow route per mode in front of it
+bench_app = FastAPI()
+
+
+@bench_app.get("/bench/slow/blocking")
+async def slow_blocking():
+    # How every route ran before the async engine: the event loop waits for the query
+    with SessionLocal() as db:
+        db.execute(text("SELECT SLEEP(:seconds)"), {"seconds": SLOW_SECONDS})
+    return {}
+
+
+@bench_app.get("/bench/slow/async")
+async def slow_async(db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT SLEEP(:seconds)"), {"seconds": SLOW_SECONDS})
+    return {}
+
+
+bench_app.mount("/", app)
+
+
+@pytest.fixture(scope="module")
+def latency_data(seed):
+    seed.users(UserType.doctor, 20, consultation_fee=500)
+    patient, = seed.users(UserType.patient)
+    seed.db.commit()
+    return seed.token(patient)
+
+
+def fast_latencies(api, token: str, mode: str) -> list:
+    """Seconds each fast request took, while the slow requests of `mode` run alongside."""
+    window = SLOW_REQUESTS * SLOW_SECONDS / 2
+
+    async def requests(client):
+        started = clock.perf_counter()
+
+        async def at(offset: float, path: str, **kwargs):
+            await asyncio.sleep(max(0.0, started + offset - clock.perf_counter()))
+            response = await client.get(path, **kwargs)
+            assert response.status_code == 200, response.text
+            return clock.perf_counter() - (started + offset)
+
+        slow = [at(window * n / SLOW_REQUESTS, f"/bench/slow/{mode}") for n in range(SLOW_REQUESTS)]
+        fast = [
+            at(window * n / FAST_REQUESTS, "/api/users/doctors", headers={"Authorization": f"Bearer {token}"})
+            for n in range(FAST_REQUESTS)
+        ]
+        return (await asyncio.gather(*slow, *fast))[SLOW_REQUESTS:]
+
+    return api(requests, asgi_app=bench_app)
+
+
+@pytest.mark.benchmark
+def test_fast_request_p99_with_slow_queries(latency_data, api, record_property):
+    results = {}
+    for mode in ("blocking", "async"):
+        latencies = fast_latencies(api, latency_data, mode)
+        percentiles = statistics.quantiles(latencies, n=100)
+        results[mode] = percentiles[49], percentiles[98]
+        record_property(f"{mode}_p50_ms", round(percentiles[49] * 1000, 1))
+        record_property(f"{mode}_p99_ms", round(percentiles[98] * 1000, 1))
+        print(
+            f"\n{mode}: {FAST_REQUESTS} fast requests next to {SLOW_REQUESTS} x {SLOW_SECONDS}s queries, "
+            f"p50 {percentiles[49] * 1000:.1f} ms, p99 {percentiles[98] * 1000:.1f} ms"
+        )
+
+    # A blocked loop holds every fast request behind the slow queries; the async engine does not
+    assert results["async"][1] < results["blocking"][1]
@@ -0,0 +1,69 @@
+"""Login throughput benchmark: bcrypt logins per second, in total and per hashing worker.
+
+Opt-in (RUN_BENCHMARKS=1, see conftest) and needs MySQL. LOGIN_BENCH_REQUESTS logins of
+LOGIN_BENCH_USERS users go through the API at once, and are compared with bcrypt verifying
+inline in this process, i.e. what a single core manages.
+"""
+import asyncio
+import os
+import time as clock
+
+import pytest
+
+from app.models.user import UserType
+from app.utils.hash import HASH_MAX_PENDING, HASH_WORKERS, hash_password, verify_password
+
+USERS = int(os.getenv("LOGIN_BENCH_USERS", "50"))
+REQUESTS = int(os.getenv("LOGIN_BENCH_REQUESTS", "200"))
+PASSWORD = "Bench@123"
+
+
+@pytest.fixture(scope="module")
+def login_users(seed):
+    """USERS patients sharing one real bcrypt hash of PASSWORD."""
+    hashed = hash_password(PASSWORD)
+    users = seed.users(UserType.patient, USERS, password=hashed)
+    seed.db.commit()
+    return [user.email for user in users], hashed
+
+
+def inline_verifies_per_second(hashed: str, seconds: float = 2) -> float:
+    count, started = 0, clock.perf_counter()
+    while clock.perf_counter() - started < seconds:
+        verify_password(PASSWORD, hashed)
+        count += 1
+    return count / (clock.perf_counter() - started)
+
+
+@pytest.mark.benchmark
+def test_login_throughput(login_users, api, record_property):
+    emails, hashed = login_users
+    single_core = inline_verifies_per_second(hashed)
+
+    async def requests(client):
+        # Up to the pool's load-shedding limit, so every login is served rather than refused
+        limit = asyncio.Semaphore(HASH_MAX_PENDING)
+
+        async def login(email):
+            async with limit:
+                return await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+
+        # Warm-up: the pool starts its workers on first use
+        await asyncio.gather(*(login(emails[n % len(emails)]) for n in range(HASH_WORKERS)))
+        started = clock.perf_counter()
+        responses = await asyncio.gather(*(login(emails[n % len(emails)]) for n in range(REQUESTS)))
+        return responses, clock.perf_counter() - started
+
+    responses, elapsed = api(requests)
+
+    logins_per_second = len(responses) / elapsed
+    record_property("logins_per_second", round(logins_per_second, 1))
+    record_property("logins_per_second_per_worker", round(logins_per_second / HASH_WORKERS, 1))
+    record_property("inline_verifies_per_second", round(single_core, 1))
+    print(
+        f"\n{len(responses)} logins in {elapsed:.2f}s: {logins_per_second:.1f}/s with {HASH_WORKERS} "
+        f"hashing workers ({logins_per_second / HASH_WORKERS:.1f}/s each); "
+        f"bcrypt inline on one core: {single_core:.1f}/s"
+    )
+
+    assert {response.status_code for response in responses} == {200}
@@ -0,0 +1,99 @@
+"""Paging benchmark: the admin appointment listing over PAGING_BENCH_APPOINTMENTS (default 1M) rows.
+
+Opt-in (RUN_BENCHMARKS=1, see conftest) and needs MySQL. Walks the whole listing with
+next_cursor, PAGING_BENCH_LIMIT rows a page, and times OFFSET pages at increasing depths for
+comparison: a keyset page costs the same at any depth, an OFFSET page reads every row before it.
+"""
+import os
+import statistics
+import time as clock
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.appoitment import Appointment, AppointmentStatus
+from app.models.user import UserType
+
+APPOINTMENTS = int(os.getenv("PAGING_BENCH_APPOINTMENTS", "1000000"))
+LIMIT = int(os.getenv("PAGING_BENCH_LIMIT", "100"))
+DOCTORS = 100
+BATCH_SIZE = 10000
+
+
+@pytest.fixture(scope="module")
+def paging_data(seed):
+    """APPOINTMENTS appointments spread over DOCTORS doctors, and an admin token."""
+    doctors = seed.users(UserType.doctor, DOCTORS, consultation_fee=500)
+    patients = seed.users(UserType.patient, DOCTORS)
+    admin, = seed.users(UserType.admin)
+    seed.db.commit()
+
+    first = datetime(2000, 1, 1, 9, 0)
+    for start in range(0, APPOINTMENTS, BATCH_SIZE):
+        seed.db.execute(insert(Appointment), [
+            {
+                "doctor_id": doctors[n % DOCTORS].id,
+                "patient_id": patients[n % DOCTORS].id,
+                # Each doctor gets one appointment per 15 minutes, so no slot is booked twice
+                "appointment_datetime": first + timedelta(minutes=15 * (n // DOCTORS)),
+                "status": AppointmentStatus.completed,
+                "notes": "paging",
+            }
+            for n in range(start, min(start + BATCH_SIZE, APPOINTMENTS))
+        ])
+        seed.db.commit()
+    return seed.token(admin)
+
+
+@pytest.mark.benchmark
+def test_page_through_appointments(paging_data, api, record_property):
+    headers = {"Authorization": f"Bearer {paging_data}"}
+
+    async def walk(client):
+        page_times, ids, rows, cursor = [], set(), 0, None
+        while True:
+            params = {"limit": LIMIT, **({"cursor": cursor} if cursor else {})}
+            started = clock.perf_counter()
+            response = await client.get("/api/appointments/", params=params, headers=headers)
+            page_times.append(clock.perf_counter() - started)
+            assert response.status_code == 200, response.text
+            body = response.json()
+            ids.update(row["id"] for row in body["data"])
+            rows += len(body["data"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                return page_times, len(ids), rows
+
+    async def offset_pages(client):
+        times = {}
+        for depth in (0, 0.1, 0.5, 0.9):
+            page = int(APPOINTMENTS * depth) // LIMIT + 1
+            started = clock.perf_counter()
+            response = await client.get("/api/appointments/", params={"limit": LIMIT, "page": page}, headers=headers)
+            times[depth] = clock.perf_counter() - started
+            assert response.status_code == 200, response.text
+        return times
+
+    started = clock.perf_counter()
+    page_times, seen, rows = api(walk)
+    elapsed = clock.perf_counter() - started
+    offset_times = api(offset_pages)
+
+    percentiles = statistics.quantiles(page_times, n=100)
+    record_property("cursor_pages", len(page_times))
+    record_property("cursor_page_p50_ms", round(percentiles[49] * 1000, 1))
+    record_property("cursor_page_p99_ms", round(percentiles[98] * 1000, 1))
+    for depth, seconds in offset_times.items():
+        record_property(f"offset_page_at_{int(depth * 100)}pct_ms", round(seconds * 1000, 1))
+    print(
+        f"\ncursor: {seen} appointments in {len(page_times)} pages, {elapsed:.1f}s, "
+        f"page p50 {percentiles[49] * 1000:.1f} ms, p99 {percentiles[98] * 1000:.1f} ms"
+    )
+    print("offset: " + ", ".join(
+        f"page at {int(depth * 100)}%: {seconds * 1000:.1f} ms" for depth, seconds in offset_times.items()
+    ))
+
+    # Every row exactly once; the listing may also hold appointments this test did not create
+    assert rows == seen
+    assert seen >= APPOINTMENTS
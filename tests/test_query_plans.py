@@ -0,0 +1,132 @@
+"""Query plan regression test: no hot router query may fall back to a full table scan.
+
+Calls each hot endpoint through the app, captures every SELECT it sends and runs EXPLAIN on
+it against MySQL (see conftest.mysql). A `type=ALL` row on a real table fails the test;
+derived tables are skipped, they are scans of rows an index already selected. Calls in
+INDEX_ORDERED also fail on "Using filesort".
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.database import async_engine
+from app.models.appoitment import Appointment, AppointmentStatus
+from app.models.doctor_schedule import DoctorSchedule, ScheduleStatus
+from app.models.user import UserType
+from app.utils.daily_availability import refresh_daily_availability_sync
+
+DAYS = 7
+SLOTS_PER_DAY = 8
+
+# (caller, path, query params); "{doctor_id}" and "{day}" are filled in from the fixture
+HOT_ENDPOINTS = [
+    ("patient", "/api/appointments/", {}),
+    ("patient", "/api/appointments/", {"status": "confirmed", "start_date": "{day}", "end_date": "{day}"}),
+    ("doctor", "/api/appointments/", {"start_date": "{day}"}),
+    ("admin", "/api/appointments/", {}),
+    ("admin", "/api/appointments/", {"doctor_id": "{doctor_id}"}),
+    ("admin", "/api/appointments/export", {"doctor_id": "{doctor_id}", "start_date": "{day}"}),
+    (None, "/api/doctor-schedule/doctor-availability/{doctor_id}", {}),
+    (None, "/api/doctor-schedule/doctor-availability/{doctor_id}", {"start_date": "{day}", "end_date": "{day}"}),
+    ("patient", "/api/doctor-schedule/doctor-availability", {}),
+    ("patient", "/api/doctor-schedule/earliest-slots", {}),
+    ("patient", "/api/users/doctors", {}),
+    ("patient", "/api/users/doctors", {"available_date": "{day}"}),
+    ("admin", "/api/users/patients", {}),
+    ("doctor", "/api/users/patients", {}),
+]
+# Calls whose LIMIT only pays off when an index yields the ORDER BY: these also fail on a filesort
+INDEX_ORDERED = [
+    ("patient", "/api/doctor-schedule/earliest-slots", {}),
+    ("admin", "/api/appointments/", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def query_plan_data(seed):
+    """A doctor with a week of slots, a patient with appointments and an admin."""
+    first_day = date.today() + timedelta(days=1)
+    doctor, = seed.users(UserType.doctor, consultation_fee=500)
+    patient, = seed.users(UserType.patient)
+    admin, = seed.users(UserType.admin)
+    days = [first_day + timedelta(days=i) for i in range(DAYS)]
+    slots = [
+        DoctorSchedule(
+            doctor_id=doctor.id, date=day, start_time=time(9 + i), end_time=time(10 + i),
+            status=ScheduleStatus.available,
+        )
+        for day in days
+        for i in range(SLOTS_PER_DAY)
+    ]
+    seed.db.add_all(slots)
+    seed.db.flush()
+    for slot in slots[::SLOTS_PER_DAY]:
+        slot.status = ScheduleStatus.booked
+        seed.db.add(Appointment(
+            patient_id=patient.id, doctor_id=doctor.id, schedule_id=slot.id,
+            appointment_datetime=datetime.combine(slot.date, slot.start_time),
+            status=AppointmentStatus.confirmed, notes="plans",
+        ))
+    seed.db.commit()
+    refresh_daily_availability_sync(doctor.id, days)
+
+    tokens = {"doctor": seed.token(doctor), "patient": seed.token(patient), "admin": seed.token(admin)}
+    return {"doctor_id": doctor.id, "day": first_day.isoformat()}, tokens
+
+
+@contextmanager
+def captured_selects():
+    """Every SELECT the app sends while the block runs, as (statement, parameters)."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+def explain(engine, statement: str, parameters) -> list:
+    # The captured parameters are in the driver's own format; the raw cursor takes them as sent.
+    # The test tables are small, and a low max_seeks_for_key stops the optimizer from preferring
+    # a scan only because every table still fits in a few pages.
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET SESSION max_seeks_for_key = 1")
+        cursor.execute(f"EXPLAIN {statement}", parameters)
+        columns = [column[0] for column in cursor.description]
+        plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.execute("SET SESSION max_seeks_for_key = DEFAULT")
+        return plan
+    finally:
+        raw.close()
+
+
+@pytest.mark.parametrize(("caller", "path", "params"), HOT_ENDPOINTS)
+def test_hot_queries_use_an_index(query_plan_data, mysql, api, caller, path, params):
+    values, tokens = query_plan_data
+    ordered = (caller, path, params) in INDEX_ORDERED
+    path = path.format(**values)
+    params = {name: str(value).format(**values) for name, value in params.items()}
+
+    headers = {"Authorization": f"Bearer {tokens[caller]}"} if caller else {}
+    with captured_selects() as statements:
+        response = api(lambda client: client.get(path, params=params, headers=headers))
+    assert response.status_code == 200, response.text
+    assert statements, f"{path} sent no SELECT"
+
+    bad_plans = []
+    for statement, parameters in statements:
+        for row in explain(mysql, statement, parameters):
+            if row["type"] == "ALL" and not str(row["table"]).startswith("<"):
+                bad_plans.append(f"{row['table']} (possible_keys={row['possible_keys']}):\n{statement}")
+            if ordered and "Using filesort" in (row["Extra"] or ""):
+                bad_plans.append(f"{row['table']} sorted with a filesort (key={row['key']}):\n{statement}")
+    assert not bad_plans, "Plans that scan or sort every row:\n\n" + "\n\n".join(bad_plans)
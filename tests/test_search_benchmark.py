@@ -0,0 +1,114 @@
+"""Name search benchmark: doctor and patient search at 100k and 1M users.
+
+Opt-in (RUN_BENCHMARKS=1, see conftest) and needs MySQL. Users are added up to each size in
+SEARCH_BENCH_SIZES (default "100000,1000000"); at every size each search term goes through
+/api/users/doctors and /api/users/patients (substring, short prefix and fuzzy), and through the
+`LIKE '%term%'` scan the indexed search replaced, for comparison.
+"""
+import os
+import random
+import statistics
+import time as clock
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from app.database import engine
+from app.models.user import User, UserType
+
+SIZES = [int(size) for size in os.getenv("SEARCH_BENCH_SIZES", "100000,1000000").split(",") if size.strip()]
+BATCH_SIZE = 10000
+SYLLABLES = ["ra", "hi", "mo", "sa", "ka", "nu", "le", "ja", "be", "to", "mi", "da", "fa", "ru", "shi", "an", "el", "or"]
+
+
+def random_name(rng: random.Random) -> str:
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+    return f"{first} {last}"
+
+
+@pytest.fixture(scope="module")
+def search_users(mysql):
+    """Adds users (a tenth of them doctors) up to a size and returns how many exist; deletes them after."""
+    tag = uuid.uuid4().hex[:8]
+    # mobile is 14 characters and unique: a run prefix, then the user's number
+    mobile_prefix = f"+7{uuid.uuid4().int % 10 ** 5:05d}"
+    rng = random.Random(42)
+    added = 0
+
+    def grow(size: int) -> int:
+        nonlocal added
+        with engine.begin() as conn:
+            while added < size:
+                count = min(BATCH_SIZE, size - added)
+                conn.execute(insert(User), [
+                    {
+                        "full_name": random_name(rng), "email": f"search-{tag}-{n}@tests.test",
+                        "mobile": f"{mobile_prefix}{n:07d}", "password": "-",
+                        "user_type": UserType.doctor if n % 10 == 0 else UserType.patient,
+                    }
+                    for n in range(added, added + count)
+                ])
+                added += count
+        return added
+
+    yield grow
+    with engine.begin() as conn:
+        conn.execute(delete(User).where(User.email.like(f"search-{tag}-%")))
+
+
+def search_terms(rng: random.Random) -> dict:
+    """Search box input by kind: full substrings, what the first keystrokes send, and typos."""
+    names = [random_name(rng) for _ in range(10)]
+    return {
+        "substring": [name.split()[1][1:5] for name in names],
+        "prefix": [name[:1] for name in names],
+        "fuzzy": [name.split()[1][::-1] for name in names],
+    }
+
+
+def timed(api, token: str, path: str, params: dict) -> float:
+    async def request(client):
+        started = clock.perf_counter()
+        response = await client.get(path, params=params, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.text
+        return clock.perf_counter() - started
+
+    return api(request)
+
+
+def like_scan(term: str) -> float:
+    """The pre-index query: a substring LIKE, which reads every users row."""
+    started = clock.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(
+            select(User.id).filter(User.user_type == UserType.patient, User.full_name.like(f"%{term}%"))
+            .order_by(User.full_name, User.id).limit(10)
+        ).all()
+        conn.execute(select(func.count()).filter(User.user_type == UserType.patient, User.full_name.like(f"%{term}%")))
+    return clock.perf_counter() - started
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", SIZES)
+def test_name_search(size, search_users, seed, api, record_property):
+    admin, = seed.users(UserType.admin)
+    seed.db.commit()
+    token = seed.token(admin)
+    users = search_users(size)
+
+    lines = []
+    for kind, terms in search_terms(random.Random(size)).items():
+        for path in ("/api/users/doctors", "/api/users/patients"):
+            params = [{"full_name": term, **({"fuzzy": "true"} if kind == "fuzzy" else {})} for term in terms]
+            latencies = sorted(timed(api, token, path, param) for param in params)
+            median = statistics.median(latencies)
+            record_property(f"{path.rsplit('/', 1)[1]}_{kind}_p50_ms", round(median * 1000, 1))
+            record_property(f"{path.rsplit('/', 1)[1]}_{kind}_max_ms", round(latencies[-1] * 1000, 1))
+            lines.append(f"{path} {kind}: p50 {median * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+        if kind == "substring":
+            scan = statistics.median(like_scan(term) for term in terms)
+            record_property("like_scan_p50_ms", round(scan * 1000, 1))
+            lines.append(f"LIKE '%term%' scan (before the index): p50 {scan * 1000:.1f} ms")
+    print(f"\n{users} benchmark users:\n  " + "\n  ".join(lines))